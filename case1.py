@@ -2,7 +2,20 @@ import sys
 import os
 import json
 import logging
+import multiprocessing
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+try:
+    import ijson
+except ImportError:  # ijson is optional; verification falls back to json.load
+    ijson = None
+
+try:
+    import fastjsonschema
+except ImportError:  # fastjsonschema is optional; falls back to a plain key check
+    fastjsonschema = None
 
 # Ensure we can import src
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -16,16 +29,28 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger("Case1Runner")
 
-def verify_file(path):
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Verification Failed: File not found - {path}")
-    if os.path.getsize(path) == 0:
-        raise ValueError(f"Verification Failed: File is empty - {path}")
-    logger.info(f"Verified exists: {path}")
+# TARGET_CLASS resolved once: unset, empty or "none" means all classes
+TARGET_CLASS = (os.getenv("TARGET_CLASS") or "").strip()
+TARGET_ALL = TARGET_CLASS.lower() in ("", "none")
 
-def verify_json_schema(path, required_keys, root_list_key=None):
-    with open(path, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+# Keys every element of the Phase 1 output lists must carry
+QUESTIONPAPER_REQUIRED_KEYS = ("question_number", "question_text", "options")
+MERGED_REQUIRED_KEYS = ("student_id", "question_id", "question_text", "options", "correct_option", "student_selected_option")
+
+def _load_first_item(f, path, root_list_key=None):
+    """
+    Returns the first element of the JSON list in the open binary file f
+    (or None if it is empty). With ijson available only that element is
+    parsed; the rest of the document is never materialized.
+    """
+    if ijson:
+        prefix = f"{root_list_key}.item" if root_list_key else "item"
+        for item in ijson.items(f, prefix):
+            return item
+        # Empty list or unexpected structure: fall through to the full check
+        f.seek(0)
+
+    data = json.load(f)
     
     if root_list_key:
         if not isinstance(data, dict) or root_list_key not in data:
@@ -34,13 +59,55 @@ def verify_json_schema(path, required_keys, root_list_key=None):
 
     if not isinstance(data, list):
         raise ValueError(f"Verification Failed: Data must be a list in {path}")
+    
+    return data[0] if data else None
+
+@lru_cache(maxsize=None)
+def _item_validator(required_keys):
+    """
+    Returns a function listing the required keys missing from an item.
+    With fastjsonschema the check is compiled once per key set; the slower
+    per-key scan only runs to build the error message.
+    """
+    def find_missing(item):
+        return [k for k in required_keys if k not in item]
+
+    if not fastjsonschema:
+        return find_missing
+
+    validate = fastjsonschema.compile({"type": "object", "required": list(required_keys)})
+
+    def check(item):
+        try:
+            validate(item)
+            return []
+        except fastjsonschema.JsonSchemaException:
+            return find_missing(item)
+
+    return check
+
+def verify_json_schema(path, required_keys, root_list_key=None):
+    """
+    Verifies that path exists, is non-empty and that the first element of its
+    JSON list carries required_keys. The file is opened exactly once.
+    """
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Verification Failed: File not found - {path}")
+    
+    with f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError(f"Verification Failed: File is empty - {path}")
+        logger.info(f"Verified exists: {path}")
         
-    if not data:
+        first_item = _load_first_item(f, path, root_list_key)
+        
+    if first_item is None:
         logger.warning(f"Warning: JSON is empty list in {path}")
         return
 
-    first_item = data[0]
-    missing = [k for k in required_keys if k not in first_item]
+    missing = _item_validator(tuple(required_keys))(first_item)
     if missing:
         raise ValueError(f"Verification Failed: Missing keys {missing} in {path}")
     
@@ -50,44 +117,107 @@ def verify_input_files(current_class):
     """Verify required input files exist for a class"""
     input_dir = os.path.join(Config.INPUT_DIR, current_class)
     
+    # Single directory scan; membership tests below need no further stat calls
+    with os.scandir(input_dir) as it:
+        file_names = [e.name for e in it if e.is_file()]
+    available = set(file_names)
+    
     # Check for PDF (flexible naming)
     pdf_candidates = ["QuestionPaper.pdf", "question_paper.pdf", "questionpaper.pdf"]
-    pdf_found = False
-    for pdf_name in pdf_candidates:
-        if os.path.exists(os.path.join(input_dir, pdf_name)):
-            pdf_found = True
-            logger.info(f"Verified input file: {pdf_name}")
-            break
+    pdf_name = next((name for name in pdf_candidates if name in available), None)
     
-    if not pdf_found:
+    if not pdf_name:
         # Try to find any PDF
-        pdf_files = [f for f in os.listdir(input_dir) if f.lower().endswith('.pdf')]
-        if not pdf_files:
+        pdf_name = next((f for f in file_names if f.lower().endswith('.pdf')), None)
+        if not pdf_name:
             raise FileNotFoundError(f"No question paper PDF found in {input_dir}")
-        logger.info(f"Verified input file: {pdf_files[0]}")
+    logger.info(f"Verified input file: {pdf_name}")
     
     # Check for required CSV files
     required_csvs = ["answer_key.csv", "response_sheet.csv"]
     for filename in required_csvs:
-        filepath = os.path.join(input_dir, filename)
-        if not os.path.exists(filepath):
+        if filename not in available:
+            filepath = os.path.join(input_dir, filename)
             raise FileNotFoundError(f"Required input file missing: {filepath}")
         logger.info(f"Verified input file: {filename}")
     
     return True
 
+def _init_class_worker(processes):
+    """
+    Pool initializer for per-class workers. Each worker paces its own LLM
+    requests and runs its own thread pool, so both the LLM_REQUESTS_PER_MINUTE
+    budget and LLM_CONCURRENCY are split between them to keep the run as a
+    whole within the provider quota.
+    """
+    rpm = Config.LLM_REQUESTS_PER_MINUTE
+    if rpm > 0:
+        Config.LLM_REQUESTS_PER_MINUTE = max(1, rpm // processes)
+    Config.LLM_CONCURRENCY = max(1, Config.LLM_CONCURRENCY // processes)
+    add_chapters_topics.load_chapter_list()
+
+def _process_one_class(current_class, subjects_ranges=None):
+    """
+    Runs the Phase 1 steps for one class, inline or in a worker process
+    Workers get subjects_ranges collected up front; inline (None) prompts
+    for them at step 2 as usual.
+    """
+    # Patch Config.DEFAULT_CLASS for this process
+    Config.DEFAULT_CLASS = current_class
+    
+    logger.info(f"=== Starting Phase 1 Execution for {current_class} ===")
+    
+    # The input CSVs do not depend on the LLM steps: read them in the
+    # background while steps 1-3 wait on the network
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        input_csvs = prefetcher.submit(merge_data.read_input_csvs, current_class)
+        
+        # 1. Extract Question Paper
+        logger.info(f"--- Step 1: Extract Question Paper ({current_class}) ---")
+        extract_questionpaper.process()
+        
+        # 2. Add Subject Assignments (interactive unless collected up front)
+        logger.info(f"--- Step 2: Assign Subjects to Questions ({current_class}) ---")
+        add_subjects.process(subjects_ranges)
+        
+        # 3. Add Chapter and Topic Assignments (LLM-based)
+        logger.info(f"--- Step 3: Assign Chapters and Topics to Questions ({current_class}) ---")
+        add_chapters_topics.process()
+        
+        # 4. Merge Data (answer_key.csv and response_sheet.csv already loaded)
+        logger.info(f"--- Step 4: Merge Data ({current_class}) ---")
+        merge_data.process(input_csvs.result())
+
+def _verify_one_class(current_class):
+    """Verifies a class's Phase 1 outputs; returns True on success"""
+    logger.info(f"=== Verifying Outputs for {current_class} ===")
+    
+    phase1_dir = os.path.join(Config.OUTPUT_DIR, current_class, "phase1")
+    qp_path = os.path.join(phase1_dir, "questionpaper.json")
+    merged_path = os.path.join(phase1_dir, "merged.json")
+
+    try:
+        verify_json_schema(qp_path, QUESTIONPAPER_REQUIRED_KEYS, root_list_key="questions")
+        verify_json_schema(merged_path, MERGED_REQUIRED_KEYS)
+        
+        logger.info(f"=== SUCCESS: {current_class} Completed and Verified ===")
+        return True
+    except Exception as e:
+        logger.error(f"Verification Failed for {current_class}: {e}")
+        return False
+
 def main():
     try:
-        target_class = os.getenv("TARGET_CLASS")
         classes_to_process = []
 
-        if not target_class or target_class.strip().lower() == "none":
+        if TARGET_ALL:
             # Detect all classes in input directory
-            if os.path.exists(Config.INPUT_DIR):
-                classes_to_process = [d for d in os.listdir(Config.INPUT_DIR) 
-                                      if os.path.isdir(os.path.join(Config.INPUT_DIR, d))]
+            input_dir = Config.INPUT_DIR
+            if os.path.exists(input_dir):
+                with os.scandir(input_dir) as it:
+                    classes_to_process = [e.name for e in it if e.is_dir()]
         else:
-            classes_to_process = [target_class]
+            classes_to_process = [TARGET_CLASS]
 
         if not classes_to_process:
             logger.error("No classes found to process.")
@@ -95,51 +225,35 @@ def main():
 
         logger.info(f"Classes to process: {classes_to_process}")
 
+        valid_classes = []
         for current_class in classes_to_process:
-            # Patch Config.DEFAULT_CLASS for this iteration
-            Config.DEFAULT_CLASS = current_class
-            
-            logger.info(f"=== Starting Phase 1 Execution for {current_class} ===")
-            
-            # Verify input files
             try:
                 verify_input_files(current_class)
             except FileNotFoundError as e:
                 logger.error(f"Input validation failed for {current_class}: {e}")
                 continue
-            
-            # 1. Extract Question Paper
-            logger.info(f"--- Step 1: Extract Question Paper ({current_class}) ---")
-            extract_questionpaper.process()
-            
-            # 2. Add Subject Assignments (Interactive)
-            logger.info(f"--- Step 2: Assign Subjects to Questions ({current_class}) ---")
-            add_subjects.process()
-            
-            # 3. Add Chapter and Topic Assignments (LLM-based)
-            logger.info(f"--- Step 3: Assign Chapters and Topics to Questions ({current_class}) ---")
-            add_chapters_topics.process()
-            
-            # 4. Merge Data (reads answer_key.csv and response_sheet.csv)
-            logger.info(f"--- Step 4: Merge Data ({current_class}) ---")
-            merge_data.process()
-            
-            # 3. Verification
-            logger.info(f"=== Verifying Outputs for {current_class} ===")
-            
-            qp_path = os.path.join(Config.OUTPUT_DIR, current_class, "phase1", "questionpaper.json")
-            merged_path = os.path.join(Config.OUTPUT_DIR, current_class, "phase1", "merged.json")
+            valid_classes.append(current_class)
 
-            try:
-                verify_file(qp_path)
-                verify_file(merged_path)
-                
-                verify_json_schema(qp_path, ["question_number", "question_text", "options"], root_list_key="questions")
-                verify_json_schema(merged_path, ["student_id", "question_id", "question_text", "options", "correct_option", "student_selected_option"])
-                
-                logger.info(f"=== SUCCESS: {current_class} Completed and Verified ===")
-            except Exception as e:
-                logger.error(f"Verification Failed for {current_class}: {e}")
+        if len(valid_classes) == 1:
+            # Inline: subject ranges are prompted for at step 2, after extraction
+            _process_one_class(valid_classes[0])
+        elif valid_classes:
+            # Classes are independent: run them in parallel processes. Worker
+            # processes cannot read from stdin, so collect subject ranges first
+            jobs = []
+            for current_class in valid_classes:
+                logger.info(f"Subject ranges for {current_class}:")
+                jobs.append((current_class, add_subjects.prompt_subject_ranges()))
+            processes = min(len(jobs), os.cpu_count() or 1)
+            with multiprocessing.Pool(processes=processes, initializer=_init_class_worker,
+                                      initargs=(processes,)) as pool:
+                pool.starmap(_process_one_class, jobs)
+
+        # Verify all processed classes in one batch, overlapping the file reads
+        if valid_classes:
+            with ThreadPoolExecutor(max_workers=min(len(valid_classes), 8)) as executor:
+                results = list(executor.map(_verify_one_class, valid_classes))
+            logger.info(f"Phase 1 verified {sum(results)}/{len(results)} classes")
     except Exception:
         logger.error("Execution FAILED")
         traceback.print_exc()
@@ -13,6 +13,10 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger("Case2Runner")
 
+# TARGET_CLASS resolved once: unset, empty or "none" means interactive selection
+TARGET_CLASS = (os.getenv("TARGET_CLASS") or "").strip()
+TARGET_ALL = TARGET_CLASS.lower() in ("", "none")
+
 def verify_student_output(student_id, students_dir):
     """Verify that a student's output file exists and is valid"""
     output_path = os.path.join(students_dir, f"{student_id}.json")
@@ -24,21 +28,19 @@ def verify_student_output(student_id, students_dir):
 
 def main():
     try:
-        # Prefer explicit environment variable
-        env_class = os.getenv("TARGET_CLASS")
-
         # Discover available classes (those with phase1/merged.json)
+        output_dir = Config.OUTPUT_DIR
         available = []
-        if os.path.exists(Config.OUTPUT_DIR):
-            for d in os.listdir(Config.OUTPUT_DIR):
-                class_path = os.path.join(Config.OUTPUT_DIR, d)
-                merged_path = os.path.join(class_path, "phase1", "merged.json")
-                if os.path.isdir(class_path) and os.path.exists(merged_path):
-                    available.append(d)
+        if os.path.exists(output_dir):
+            with os.scandir(output_dir) as it:
+                for entry in it:
+                    merged_path = os.path.join(entry.path, "phase1", "merged.json")
+                    if entry.is_dir() and os.path.exists(merged_path):
+                        available.append(entry.name)
 
-        if env_class and env_class.strip().lower() != "none":
-            # Use environment override (non-interactive)
-            classes_to_process = [env_class]
+        if not TARGET_ALL:
+            # Prefer explicit environment override (non-interactive)
+            classes_to_process = [TARGET_CLASS]
         else:
             # Interactive prompt: require user to pick from available classes or 'all'
             if not available:
@@ -19,7 +19,9 @@ def main():
         
         # Step 1: Aggregate student data (group by topic across tests)
         logger.info("--- Step 1: Data Aggregation ---")
-        student_data = data_aggregator.process()
+        # Keep the parsed student files so Step 3 can update them without re-reading
+        student_docs = {}
+        student_data = data_aggregator.process(student_docs)
         
         if not student_data:
             logger.error("No student data loaded. Phase 3 cannot proceed.")
@@ -39,7 +41,7 @@ def main():
         
         # Step 3: Write outputs
         logger.info("--- Step 3: Write Outputs ---")
-        output_writer.process(all_insights)
+        output_writer.process(all_insights, base_docs=student_docs)
         
         # Verification
         logger.info("=== Verification ===")
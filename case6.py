@@ -6,12 +6,8 @@ Generates per-student PDF reports combining:
 """
 import os
 import sys
-from dotenv import load_dotenv
 from src.utils.logger import setup_logger
 
-# Load environment variables
-load_dotenv()
-
 logger = setup_logger(__name__)
 
 
@@ -23,6 +19,10 @@ def main():
     logger.info("PHASE 6: PDF REPORT GENERATION")
     logger.info("=" * 80)
     
+    # Load environment variables (imported here to keep startup light)
+    from dotenv import load_dotenv
+    load_dotenv()
+    
     # Get target student from environment (optional)
     target_student = os.getenv("STUDENT_NAME", "").strip()
     
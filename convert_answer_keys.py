@@ -2,8 +2,8 @@
 Helper script to convert answer_key.json to answer_key.csv format
 """
 import os
+import csv
 import json
-import pandas as pd
 from src.config import Config
 
 def convert_answer_key(class_name):
@@ -19,16 +19,11 @@ def convert_answer_key(class_name):
     with open(json_path, 'r') as f:
         data = json.load(f)
     
-    # Convert to CSV format
-    rows = []
-    for item in data:
-        rows.append({
-            'question_id': item['question_id'],
-            'Answer': item['correct_option']
-        })
-    
-    df = pd.DataFrame(rows)
-    df.to_csv(csv_path, index=False)
+    # Convert to CSV format (two plain columns; no need for a DataFrame)
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['question_id', 'Answer'])
+        writer.writerows((item['question_id'], item['correct_option']) for item in data)
     print(f"✓ Converted {class_name}/answer_key.json to CSV")
 
 def main():
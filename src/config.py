@@ -10,6 +10,28 @@ class Config:
     BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     INPUT_DIR = os.path.join(BASE_DIR, "input")
     OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+    # Pretty-print machine-consumed JSON outputs for debugging
+    DEBUG = os.getenv("DEBUG", "").strip().lower() in ("1", "true", "yes")
+
+    # LLM Concurrency
+    LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+    # Provider request budget for the whole run; pacing is per process, so case1 splits
+    # it evenly across its parallel class workers. The default of 60/min matches the
+    # ceiling of the old sequential 1 s sleep between calls, so concurrent calls do not
+    # lean on 429 retries; raise it to the provider quota (0 = no client-side limit)
+    LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "60"))
+    # Students per Phase 5 insights call (1 = one call per student)
+    PHASE5_BATCH_SIZE = int(os.getenv("PHASE5_BATCH_SIZE", "1"))
+    # On-disk cache of LLM analyses keyed by input content hash (LLM_CACHE=0 disables)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1").strip().lower() not in ("0", "false", "no")
+    LLM_CACHE_DIR = os.path.join(OUTPUT_DIR, ".llm_cache")
+
+    # Thread pool size for parallel JSON file loading (I/O-bound)
+    IO_WORKERS = int(os.getenv("IO_WORKERS", str(min(16, (os.cpu_count() or 4) * 2))))
+    # Process pool size for CPU-bound per-student work
+    CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 1)))
+
     # Defaults
     DEFAULT_CLASS = os.getenv("TARGET_CLASS", "class_medical")
     
@@ -1,10 +1,13 @@
 import os
-import json
+import glob
 import logging
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 from src.config import Config
 from src.utils.logger import setup_logger
 from src.utils.llm_helper import setup_gemini, call_gemini_json
-from src.phase1.neet_data import chapter_list
+from src.utils.json_helper import json_loads, json_dumps
 
 logger = setup_logger(__name__)
 
@@ -24,45 +27,30 @@ IMPORTANT INSTRUCTIONS:
 - DO NOT create new chapter or topic names - use ONLY the ones provided in the structure
 
 OUTPUT FORMAT (strict JSON):
-{
-  "assignments": [
-    {
-      "question_id": "Q46",
-      "question_number": 46,
-      "chapter": "exact chapter name from structure",
-      "topic": "exact topic name from structure"
-    },
-    ...
-  ]
-}
+{"assignments": [{"question_id": "Q46", "question_number": 46, "chapter": "exact chapter name from structure", "topic": "exact topic name from structure"}, ...]}
 
 Return valid JSON only. No markdown fences, no extra text.
 """
 
+# Enough to identify the concept being tested; longer text only adds tokens
+QUESTION_TEXT_LIMIT = 500
+
+@lru_cache(maxsize=None)
+def load_chapter_list():
+    """
+    Returns the NEET chapter/topic structure, importing neet_data on first use
+    only. Used as a Pool initializer so each worker loads it exactly once.
+    """
+    from src.phase1.neet_data import chapter_list
+    return chapter_list
+
 def chunk_questions(questions, chunk_size=45):
     """Split questions into chunks for batch processing"""
     for i in range(0, len(questions), chunk_size):
         yield questions[i:i + chunk_size]
 
-def assign_chapter_topic_for_subject(subject_name, questions, chapter_data):
-    """
-    Sends questions of a subject to LLM along with chapter/topic structure
-    to get chapter and topic assignments.
-    
-    Args:
-        subject_name: Name of the subject
-        questions: List of question dicts for this subject
-        chapter_data: List of chapter/topic structure for this subject
-    
-    Returns:
-        Dict mapping question_number -> {chapter, topic}
-    """
-    logger.info(f"Processing {len(questions)} questions for subject: {subject_name}")
-    
-    assignments = {}
-    
-    # Process in chunks to avoid token limits
-    # Ensure we are sending only the chapter/topic structure for this subject
+def _normalize_chapter_data(subject_name, chapter_data):
+    """Ensure we are sending only the chapter/topic structure for this subject"""
     if isinstance(chapter_data, dict):
         # If the caller accidentally passed the full mapping, try to extract the subject key
         if subject_name in chapter_data:
@@ -75,57 +63,119 @@ def assign_chapter_topic_for_subject(subject_name, questions, chapter_data):
     if not isinstance(chapter_data, list):
         chapter_data = [chapter_data]
 
-    for chunk_idx, q_chunk in enumerate(chunk_questions(questions, chunk_size=45)):
-        logger.info(f"  Processing chunk {chunk_idx + 1} ({len(q_chunk)} questions)")
+    return chapter_data
+
+def _build_chunk_tasks(subject_name, questions, chapter_data):
+    """Split a subject's questions into (subject, chunk_idx, chunk, content_prefix) tasks"""
+    chapter_data = _normalize_chapter_data(subject_name, chapter_data)
+    
+    # The subject and chapter structure are identical for every chunk:
+    # serialize them once per subject and reuse the prefix
+    content_prefix = (
+        '{"subject":' + json_dumps(subject_name).decode('utf-8')
+        + ',"chapter_topic_structure":' + json_dumps(chapter_data).decode('utf-8')
+    )
+    return [
+        (subject_name, chunk_idx, q_chunk, content_prefix)
+        for chunk_idx, q_chunk in enumerate(chunk_questions(questions, chunk_size=45))
+    ]
+
+def _compact_question(q):
+    """
+    Builds the minimal question payload for the LLM: whitespace-normalized,
+    length-capped text and options only when present (fewer prompt tokens).
+    """
+    question_text = " ".join(str(q.get("question_text") or "").split())
+    entry = {
+        "question_id": q.get("question_id"),
+        "question_number": q.get("question_number"),
+        "question_text": question_text[:QUESTION_TEXT_LIMIT]
+    }
+    options = q.get("options")
+    if options:
+        entry["options"] = options
+    return entry
+
+def _assign_chunk(subject_name, chunk_idx, q_chunk, content_prefix):
+    """
+    Sends one chunk of a subject's questions to the LLM.
+    
+    Returns:
+        Dict mapping question_number -> {chapter, topic} for this chunk
+    """
+    logger.info(f"  Processing {subject_name} chunk {chunk_idx + 1} ({len(q_chunk)} questions)")
+    
+    assignments = {}
+    
+    # Prepare input for LLM (compact encoding: the LLM does not need indentation)
+    questions_data = [_compact_question(q) for q in q_chunk]
+    content = content_prefix + ',"questions":' + json_dumps(questions_data).decode('utf-8') + '}'
+    
+    try:
+        response = call_gemini_json(CHAPTER_TOPIC_ASSIGNMENT_PROMPT, content)
         
-        # Prepare input for LLM
-        chunk_data = {
-            "subject": subject_name,
-            "chapter_topic_structure": chapter_data,
-            "questions": [
-                {
-                    "question_id": q.get("question_id"),
-                    "question_number": q.get("question_number"),
-                    "question_text": q.get("question_text", ""),
-                    "options": q.get("options", [])
-                }
-                for q in q_chunk
-            ]
-        }
+        # Extract assignments
+        if isinstance(response, dict) and "assignments" in response:
+            for item in response["assignments"]:
+                q_num = item.get("question_number")
+                if q_num:
+                    assignments[q_num] = {
+                        "chapter": item.get("chapter", "Unknown"),
+                        "topic": item.get("topic", "Unknown")
+                    }
+        elif isinstance(response, list):
+            # Handle if LLM returns list directly
+            for item in response:
+                q_num = item.get("question_number")
+                if q_num:
+                    assignments[q_num] = {
+                        "chapter": item.get("chapter", "Unknown"),
+                        "topic": item.get("topic", "Unknown")
+                    }
         
-        content = json.dumps(chunk_data, indent=2)
+        logger.info(f"  Assigned chapter/topic to {len(assignments)} questions in {subject_name} chunk {chunk_idx + 1}")
         
-        try:
-            response = call_gemini_json(CHAPTER_TOPIC_ASSIGNMENT_PROMPT, content)
-            
-            # Extract assignments
-            if isinstance(response, dict) and "assignments" in response:
-                for item in response["assignments"]:
-                    q_num = item.get("question_number")
-                    if q_num:
-                        assignments[q_num] = {
-                            "chapter": item.get("chapter", "Unknown"),
-                            "topic": item.get("topic", "Unknown")
-                        }
-            elif isinstance(response, list):
-                # Handle if LLM returns list directly
-                for item in response:
-                    q_num = item.get("question_number")
-                    if q_num:
-                        assignments[q_num] = {
-                            "chapter": item.get("chapter", "Unknown"),
-                            "topic": item.get("topic", "Unknown")
-                        }
-            
-            logger.info(f"  Assigned chapter/topic to {len(assignments)} questions so far")
-            
-        except Exception as e:
-            logger.error(f"  Failed to get assignments for chunk {chunk_idx + 1}: {e}")
-            # Continue with other chunks
-            continue
+    except Exception as e:
+        # Other chunks continue independently
+        logger.error(f"  Failed to get assignments for {subject_name} chunk {chunk_idx + 1}: {e}")
+    
+    return assignments
+
+def _run_chunk_tasks(tasks):
+    """
+    Runs chunk tasks concurrently (LLM calls are network-bound) and merges
+    their results once each future completes.
+    """
+    assignments = {}
+    if not tasks:
+        return assignments
+    
+    max_workers = max(1, min(len(tasks), Config.LLM_CONCURRENCY))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_assign_chunk, *task) for task in tasks]
+        for future in as_completed(futures):
+            assignments.update(future.result())
     
     return assignments
 
+def assign_chapter_topic_for_subject(subject_name, questions, chapter_data):
+    """
+    Sends questions of a subject to LLM along with chapter/topic structure
+    to get chapter and topic assignments.
+    
+    Args:
+        subject_name: Name of the subject
+        questions: List of question dicts for this subject
+        chapter_data: List of chapter/topic structure for this subject
+    
+    Returns:
+        Dict mapping question_number -> {chapter, topic}
+    """
+    logger.info(f"Processing {len(questions)} questions for subject: {subject_name}")
+    
+    # Process in chunks to avoid token limits
+    return _run_chunk_tasks(_build_chunk_tasks(subject_name, questions, chapter_data))
+
 def process():
     """
     Main entry point: assigns chapter and topic to each question based on subject
@@ -137,7 +187,6 @@ def process():
     
     if not os.path.exists(qp_path):
         # Fallback: search for any class folder that contains phase1/questionpaper.json
-        import glob
         pattern = os.path.join(Config.OUTPUT_DIR, "*", "phase1", "questionpaper.json")
         matches = glob.glob(pattern)
         if matches:
@@ -150,32 +199,34 @@ def process():
     logger.info(f"Reading question paper from {qp_path}")
     
     # Load existing questionpaper.json (should have subjects assigned)
-    with open(qp_path, 'r', encoding='utf-8') as f:
-        qp_data = json.load(f)
+    with open(qp_path, 'rb') as f:
+        qp_data = json_loads(f.read())
         questions = qp_data.get("questions") if isinstance(qp_data, dict) else qp_data
     
     if not questions:
         logger.warning("No questions found in questionpaper.json")
         return
     
+    # Questions without a subject cannot be matched to a chapter structure;
+    # they only receive the defaults in the update loop below
+    known_questions = [q for q in questions if q.get("subject", "Unknown") != "Unknown"]
+    unknown_count = len(questions) - len(known_questions)
+    if unknown_count:
+        logger.warning(f"Skipping {unknown_count} questions with 'Unknown' subject")
+    
     # Group questions by subject
-    questions_by_subject = {}
-    for q in questions:
-        subject = q.get("subject", "Unknown")
-        if subject not in questions_by_subject:
-            questions_by_subject[subject] = []
-        questions_by_subject[subject].append(q)
+    questions_by_subject = defaultdict(list)
+    for q in known_questions:
+        questions_by_subject[q["subject"]].append(q)
     
     logger.info(f"Found {len(questions_by_subject)} subjects to process")
     
-    # Process each subject
+    # Process each subject: chunks from all subjects share one worker pool
+    chapter_list = load_chapter_list()
     all_assignments = {}
+    chunk_tasks = []
     
     for subject_name, subject_questions in questions_by_subject.items():
-        if subject_name == "Unknown":
-            logger.warning(f"Skipping {len(subject_questions)} questions with 'Unknown' subject")
-            continue
-        
         # Get chapter/topic structure for this subject
         if subject_name not in chapter_list:
             logger.warning(f"No chapter data found for subject '{subject_name}' in neet_data.py")
@@ -191,45 +242,39 @@ def process():
         
         chapter_data = chapter_list[subject_name]
         
-        # Get assignments from LLM
-        subject_assignments = assign_chapter_topic_for_subject(
-            subject_name,
-            subject_questions,
-            chapter_data
-        )
-        
-        all_assignments.update(subject_assignments)
+        logger.info(f"Queueing {len(subject_questions)} questions for subject: {subject_name}")
+        chunk_tasks.extend(_build_chunk_tasks(subject_name, subject_questions, chapter_data))
+    
+    # Get assignments from LLM
+    all_assignments.update(_run_chunk_tasks(chunk_tasks))
     
     # Update questions with chapter and topic
     updated_count = 0
     for q in questions:
-        q_num = q.get("question_number")
-        if q_num and q_num in all_assignments:
-            q["chapter"] = all_assignments[q_num]["chapter"]
-            q["topic"] = all_assignments[q_num]["topic"]
+        assignment = all_assignments.get(q.get("question_number"))
+        if assignment:
+            q.update(assignment)
             updated_count += 1
         else:
             # Default values if not assigned
-            q["chapter"] = q.get("chapter", "Unknown")
-            q["topic"] = q.get("topic", "Unknown")
+            q.setdefault("chapter", "Unknown")
+            q.setdefault("topic", "Unknown")
     
     logger.info(f"Assigned chapter/topic to {updated_count} questions")
     
     # Save updated questionpaper.json
     output_data = {"questions": questions}
-    with open(qp_path, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=4)
+    with open(qp_path, 'wb') as f:
+        # Machine-consumed: compact unless debugging
+        f.write(json_dumps(output_data, pretty=Config.DEBUG))
     
     logger.info(f"Updated questionpaper.json with chapter and topic assignments")
     
     # Print summary
     print("\nChapter/Topic assignment summary:")
-    chapter_counts = {}
-    for q in questions:
-        subj = q.get("subject", "Unknown")
-        chap = q.get("chapter", "Unknown")
-        key = f"{subj} - {chap}"
-        chapter_counts[key] = chapter_counts.get(key, 0) + 1
+    chapter_counts = Counter(
+        f"{q.get('subject', 'Unknown')} - {q.get('chapter', 'Unknown')}" for q in questions
+    )
     
     for key, count in sorted(chapter_counts.items()):
         print(f"  {key}: {count} questions")
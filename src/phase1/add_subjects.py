@@ -1,8 +1,10 @@
 import os
-import json
+import glob
 import logging
+from collections import Counter
 from src.config import Config
 from src.utils.logger import setup_logger
+from src.utils.json_helper import load_json_file, dump_json_file
 
 logger = setup_logger(__name__)
 
@@ -63,12 +65,14 @@ def assign_subjects_to_questions(subjects_ranges):
     
     Args:
         subjects_ranges: List of tuples [(subject_name, start_q, end_q), ...]
+    
+    Returns:
+        The saved question paper dict, or None when there were no questions
     """
     qp_path = os.path.join(Config.OUTPUT_DIR, Config.DEFAULT_CLASS, "phase1", "questionpaper.json")
     
     if not os.path.exists(qp_path):
         # Fallback: search for any class folder that contains phase1/questionpaper.json
-        import glob
         pattern = os.path.join(Config.OUTPUT_DIR, "*", "phase1", "questionpaper.json")
         matches = glob.glob(pattern)
         if matches:
@@ -81,58 +85,63 @@ def assign_subjects_to_questions(subjects_ranges):
     logger.info(f"Reading question paper from {qp_path}")
     
     # Load existing questionpaper.json
-    with open(qp_path, 'r', encoding='utf-8') as f:
-        qp_data = json.load(f)
-        questions = qp_data.get("questions") if isinstance(qp_data, dict) else qp_data
+    qp_data = load_json_file(qp_path)
+    questions = qp_data.get("questions") if isinstance(qp_data, dict) else qp_data
     
     if not questions:
         logger.warning("No questions found in questionpaper.json")
-        return
+        return None
     
-    # Build a lookup: question_number -> subject_name
-    def get_subject_for_question(q_num):
-        for subject_name, start_q, end_q in subjects_ranges:
-            if start_q <= q_num <= end_q:
-                return subject_name
-        return "Unknown"
+    # Build a lookup once: question_number -> subject_name
+    # (reversed so that, as before, the first matching range wins on overlap)
+    subject_lookup = {}
+    for subject_name, start_q, end_q in reversed(subjects_ranges):
+        for q_num in range(start_q, end_q + 1):
+            subject_lookup[q_num] = subject_name
     
     # Add subject field to each question
     updated_count = 0
     for q in questions:
         q_num = q.get("question_number")
         if q_num:
-            q["subject"] = get_subject_for_question(int(q_num))
+            q["subject"] = subject_lookup.get(int(q_num), "Unknown")
             updated_count += 1
     
     logger.info(f"Assigned subjects to {updated_count} questions")
     
     # Save updated questionpaper.json
     output_data = {"questions": questions}
-    with open(qp_path, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=4)
+    dump_json_file(output_data, qp_path, pretty=Config.DEBUG)
     
     logger.info(f"Updated questionpaper.json with subject assignments")
     
     # Print summary
-    subject_counts = {}
-    for q in questions:
-        subj = q.get("subject", "Unknown")
-        subject_counts[subj] = subject_counts.get(subj, 0) + 1
+    subject_counts = Counter(q.get("subject", "Unknown") for q in questions)
     
     print("\nSubject assignment summary:")
     for subj, count in sorted(subject_counts.items()):
         print(f"  {subj}: {count} questions")
+    
+    return output_data
 
-def process():
+def process(subjects_ranges=None):
     """
     Main entry point: prompts user for subject ranges and updates questionpaper.json
+    
+    Args:
+        subjects_ranges: Optional pre-collected ranges; prompts interactively when None
+    
+    Returns:
+        The updated question paper dict, or None when nothing was assigned
     """
-    subjects_ranges = prompt_subject_ranges()
+    if subjects_ranges is None:
+        subjects_ranges = prompt_subject_ranges()
     
     if subjects_ranges:
-        assign_subjects_to_questions(subjects_ranges)
-    else:
-        logger.info("Skipping subject assignment (no ranges provided)")
+        return assign_subjects_to_questions(subjects_ranges)
+    
+    logger.info("Skipping subject assignment (no ranges provided)")
+    return None
 
 if __name__ == "__main__":
     process()
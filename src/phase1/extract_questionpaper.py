@@ -1,10 +1,10 @@
 import os
-import json
 import logging
 from src.config import Config
 from src.utils.logger import setup_logger
 from src.utils.pdf_loader import load_pdf_pages
 from src.utils.llm_helper import setup_gemini, call_gemini_json
+from src.utils.json_helper import dump_json_file
 from src.prompts import PHASE_1_EXTRACT_QUESTION_PROMPT
 
 logger = setup_logger(__name__)
@@ -14,22 +14,18 @@ def process():
     
     class_input_dir = os.path.join(Config.INPUT_DIR, Config.DEFAULT_CLASS)
     
-    # Try multiple PDF filename variations
+    # Try multiple PDF filename variations, then any PDF (one directory scan)
     pdf_candidates = ["QuestionPaper.pdf", "question_paper.pdf", "questionpaper.pdf"]
     input_path = None
     
-    for candidate in pdf_candidates:
-        path = os.path.join(class_input_dir, candidate)
-        if os.path.exists(path):
-            input_path = path
-            break
-    
-    if not input_path:
-        # Fallback: find any PDF file in the directory
-        if os.path.exists(class_input_dir):
-            pdf_files = [f for f in os.listdir(class_input_dir) if f.lower().endswith('.pdf')]
-            if pdf_files:
-                input_path = os.path.join(class_input_dir, pdf_files[0])
+    if os.path.isdir(class_input_dir):
+        with os.scandir(class_input_dir) as it:
+            pdf_files = {e.name: e.path for e in it if e.is_file() and e.name.lower().endswith('.pdf')}
+        
+        input_path = next((pdf_files[c] for c in pdf_candidates if c in pdf_files), None)
+        if not input_path and pdf_files:
+            # Fallback: any PDF file in the directory
+            input_path = next(iter(pdf_files.values()))
     
     if not input_path:
         raise FileNotFoundError(f"No question paper PDF found in {class_input_dir}")
@@ -96,8 +92,7 @@ def process():
     
     output_data = {"questions": final_questions}
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=4)
+    dump_json_file(output_data, output_path, pretty=Config.DEBUG)
     
     logger.info(f"Saved to {output_path}")
 
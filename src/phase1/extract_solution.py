@@ -1,11 +1,11 @@
 import os
-import json
 import logging
 import pandas as pd
 from src.config import Config
 from src.utils.logger import setup_logger
 from src.utils.pdf_loader import load_pdf_pages
 from src.utils.llm_helper import setup_gemini, call_gemini_json
+from src.utils.json_helper import load_json_file, dump_json_file
 from src.prompts import PHASE_1_EXTRACT_SOLUTION_PROMPT
 
 logger = setup_logger(__name__)
@@ -96,8 +96,7 @@ def load_answer_key_excel(file_path):
 def load_answer_key_json(json_path):
     logger.info(f"Loading Answer Key from JSON: {json_path}")
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_json_file(json_path)
             
         solutions = []
         for item in data:
@@ -259,8 +258,7 @@ def process():
     # Step 3: Wrap in root object
     output_data = {"solutions": processed_final}
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=4)
+    dump_json_file(output_data, output_path, pretty=True)
     
     logger.info(f"Saved to {output_path}")
 
@@ -1,26 +1,112 @@
 import os
-import json
+import glob
 import logging
 import re
 import pandas as pd
 from src.config import Config
 from src.utils.logger import setup_logger
+from src.utils.json_helper import load_json_file, json_dumps
 
 logger = setup_logger(__name__)
 
-def process():
+VALID_OPTIONS = ["A", "B", "C", "D"]
+
+# Per-question fields copied onto every student record
+QUESTION_FIELDS = ["question_text", "options_map", "subject", "chapter", "topic"]
+
+# Field order of each merged.json record
+MERGED_COLUMNS = [
+    "student_id", "question_id", "question_text", "options_map",
+    "subject", "chapter", "topic", "correct_option", "student_selected_option"
+]
+
+# Leading numeric labels on option text like '(1) ', '1) ', '1. ' etc.
+_OPTION_PREFIX_RE = re.compile(r'^\s*\(?\s*\d+\s*\)?[\.)\-]*\s*')
+
+def _clean_option(text: str) -> str:
+    if not isinstance(text, str):
+        return text
+    return _OPTION_PREFIX_RE.sub('', text).strip()
+
+def _iter_records(df):
+    """Yields each DataFrame row as a record dict without materializing the list"""
+    for row in df.itertuples(index=False, name=None):
+        yield dict(zip(df.columns, row))
+
+def _map_question_field(question_ids, field_values):
+    """
+    Looks up one question field for every record. Series.map turns None
+    values into NaN, which the stdlib encoder would write as invalid JSON
+    (NaN), so missing values are restored to None (written as null).
+    """
+    mapped = question_ids.map(field_values).astype(object)
+    return mapped.where(mapped.notna(), None)
+
+def _write_json_array(f, records, pretty=False):
+    """
+    Streams records to the binary file f as a JSON array, one element at a time.
+    Compact by default; pretty=True matches json_dumps(records, pretty=True).
+    """
+    f.write(b"[")
+    first = True
+    for record in records:
+        if pretty:
+            f.write(b"\n  " if first else b",\n  ")
+            # Encoded strings never contain raw newlines, so this only re-indents structure
+            f.write(json_dumps(record, pretty=True).replace(b"\n", b"\n  "))
+        else:
+            f.write(b"" if first else b",")
+            f.write(json_dumps(record))
+        first = False
+    f.write(b"\n]" if pretty and not first else b"]")
+
+def read_input_csvs(class_name=None):
+    """
+    Reads answer_key.csv and response_sheet.csv for a class.
+    Independent of the LLM steps, so callers may run it ahead of time
+    (e.g. in a background thread) and pass the result to process().
+    
+    Returns:
+        (df_answer, df_response)
+    """
+    class_name = class_name or Config.DEFAULT_CLASS
+    answer_key_path = os.path.join(Config.INPUT_DIR, class_name, "answer_key.csv")
+    response_sheet_path = os.path.join(Config.INPUT_DIR, class_name, "response_sheet.csv")
+    
+    if not os.path.exists(answer_key_path):
+        raise FileNotFoundError(f"Answer Key CSV not found: {answer_key_path}")
+    if not os.path.exists(response_sheet_path):
+        raise FileNotFoundError(f"Response Sheet CSV not found: {response_sheet_path}")
+    
+    # Read Answer Key CSV (format: question_id,Answer)
+    logger.info(f"Reading answer key from: {answer_key_path}")
+    df_answer = pd.read_csv(answer_key_path)
+    # Normalize column names (trim spaces)
+    df_answer.columns = df_answer.columns.str.strip()
+    
+    # Read Response Sheet CSV (format: question_id as first col, students as remaining cols)
+    logger.info(f"Reading response sheet from: {response_sheet_path}")
+    df_response = pd.read_csv(response_sheet_path)
+    
+    return df_answer, df_response
+
+def process(input_csvs=None):
+    """
+    Merges questionpaper.json with the answer key and response sheet into merged.json
+    
+    Args:
+        input_csvs: Optional (df_answer, df_response) from read_input_csvs();
+            read here when not provided
+    """
     logger.info("Starting Phase 1: Merge Data")
     
     # Paths
     qp_path = os.path.join(Config.OUTPUT_DIR, Config.DEFAULT_CLASS, "phase1", "questionpaper.json")
-    answer_key_path = os.path.join(Config.INPUT_DIR, Config.DEFAULT_CLASS, "answer_key.csv")
-    response_sheet_path = os.path.join(Config.INPUT_DIR, Config.DEFAULT_CLASS, "response_sheet.csv")
     output_path = os.path.join(Config.OUTPUT_DIR, Config.DEFAULT_CLASS, "phase1", "merged.json")
     
     # Validate input files exist
     if not os.path.exists(qp_path):
         # Fallback: search for any class folder that contains phase1/questionpaper.json
-        import glob
         pattern = os.path.join(Config.OUTPUT_DIR, "*", "phase1", "questionpaper.json")
         matches = glob.glob(pattern)
         if matches:
@@ -29,19 +115,19 @@ def process():
             print(f"Found questionpaper.json at: {qp_path}")
         else:
             raise FileNotFoundError(f"Question Paper JSON not found: {qp_path}")
-    if not os.path.exists(answer_key_path):
-        raise FileNotFoundError(f"Answer Key CSV not found: {answer_key_path}")
-    if not os.path.exists(response_sheet_path):
-        raise FileNotFoundError(f"Response Sheet CSV not found: {response_sheet_path}")
+    
+    if input_csvs is None:
+        input_csvs = read_input_csvs()
+    df_answer, df_response = input_csvs
         
     # Read Question Paper JSON
     logger.info(f"Reading question paper from: {qp_path}")
-    with open(qp_path, 'r', encoding='utf-8') as f:
-        qp_data = json.load(f)
-        questions = qp_data.get("questions") if isinstance(qp_data, dict) else qp_data
+    qp_data = load_json_file(qp_path)
+    questions = qp_data.get("questions") if isinstance(qp_data, dict) else qp_data
     
-    # Build question map: question_number -> question details
-    question_map = {}
+    # Question details as one column per field (structure of arrays), indexed by question_number
+    question_ids = []
+    question_columns = {field: [] for field in QUESTION_FIELDS}
     for q in questions:
         q_num = q.get("question_number")
         if q_num:
@@ -54,99 +140,74 @@ def process():
                 except Exception:
                     opts = []
 
-            options_map = {}
-            labels = ["A", "B", "C", "D"]
+            # Labeled map A-D; missing options become ""
+            options_map = {label: _clean_option(opts[i]) if i < len(opts) else ""
+                           for i, label in enumerate(VALID_OPTIONS)}
 
-            def _clean_option(text: str) -> str:
-                if not isinstance(text, str):
-                    return text
-                # Remove leading numeric labels like '(1) ', '1) ', '1. ' etc.
-                cleaned = re.sub(r'^\s*\(?\s*\d+\s*\)?[\.)\-]*\s*', '', text)
-                return cleaned.strip()
-
-            for i, label in enumerate(labels):
-                raw = opts[i] if i < len(opts) else ""
-                options_map[label] = _clean_option(raw)
-
-            question_map[int(q_num)] = {
-                "question_text": q.get("question_text", ""),
-                "options": opts,
-                "options_map": options_map,
-                "subject": q.get("subject", "Unknown"),
-                "chapter": q.get("chapter", "Unknown"),
-                "topic": q.get("topic", "Unknown")
-            }
+            question_ids.append(int(q_num))
+            question_columns["question_text"].append(q.get("question_text", ""))
+            question_columns["options_map"].append(options_map)
+            question_columns["subject"].append(q.get("subject", "Unknown"))
+            question_columns["chapter"].append(q.get("chapter", "Unknown"))
+            question_columns["topic"].append(q.get("topic", "Unknown"))
     
-    logger.info(f"Loaded {len(question_map)} questions from questionpaper.json")
+    question_df = pd.DataFrame(question_columns, index=question_ids)
+    # A repeated question_number keeps its last definition
+    question_df = question_df[~question_df.index.duplicated(keep="last")]
     
-    # Read Answer Key CSV (format: question_id,Answer)
-    logger.info(f"Reading answer key from: {answer_key_path}")
-    df_answer = pd.read_csv(answer_key_path)
-    # Normalize column names (trim spaces)
-    df_answer.columns = df_answer.columns.str.strip()
+    logger.info(f"Loaded {len(question_df)} questions from questionpaper.json")
     
-    # Build answer map: question_number -> correct_option
-    answer_map = {}
-    for _, row in df_answer.iterrows():
-        q_id = int(row.iloc[0])  # First column is question_id
-        correct_ans = str(row.iloc[1]).strip().upper()  # Second column is Answer
-        answer_map[q_id] = correct_ans
+    # Build answer map: question_number -> correct_option (column-wise, no per-row boxing)
+    answer_map = dict(zip(
+        df_answer.iloc[:, 0].astype(int).tolist(),  # First column is question_id
+        df_answer.iloc[:, 1].astype(str).str.strip().str.upper().tolist()  # Second column is Answer
+    ))
     
     logger.info(f"Loaded {len(answer_map)} answers from answer_key.csv")
     
-    # Read Response Sheet CSV (format: question_id as first col, students as remaining cols)
-    logger.info(f"Reading response sheet from: {response_sheet_path}")
-    df_response = pd.read_csv(response_sheet_path)
-    
-    # First column is question_id, rest are student IDs
+    # Response sheet: first column is question_id, rest are student IDs
     question_col = df_response.columns[0]
     student_cols = df_response.columns[1:]
     
     logger.info(f"Found {len(student_cols)} students in response sheet")
     
-    # Build merged data: list of student-question records
-    merged_data = []
+    responses = df_response.set_index(question_col)
+    responses.index = responses.index.astype(int)
     
-    for _, row in df_response.iterrows():
-        q_num = int(row[question_col])
-        
-        # Get question details
-        q_details = question_map.get(q_num)
-        if not q_details:
+    # Validate questions in sheet order (small loop: one entry per question)
+    for q_num in responses.index.tolist():
+        if q_num not in question_df.index:
             logger.warning(f"Question {q_num} not found in questionpaper.json, skipping")
-            continue
-            
-        # Get correct answer
-        correct_option = answer_map.get(q_num)
-        if not correct_option:
+        elif not answer_map.get(q_num):
             logger.error(f"CRITICAL: No correct answer for question {q_num} in answer_key.csv")
             raise ValueError(f"Missing correct answer for question {q_num}")
-        
-        # For each student, create a record
-        for student_id in student_cols:
-            selected_option = str(row[student_id]).strip().upper() if pd.notna(row[student_id]) else ""
-            
-            # Handle empty or invalid responses
-            if selected_option not in ['A', 'B', 'C', 'D']:
-                selected_option = ""
-            
-            merged_data.append({
-                "student_id": str(student_id),
-                "question_id": q_num,
-                "question_text": q_details["question_text"],
-                "options_map": q_details.get("options_map", {}),
-                "subject": q_details.get("subject", "Unknown"),
-                "chapter": q_details.get("chapter", "Unknown"),
-                "topic": q_details.get("topic", "Unknown"),
-                "correct_option": correct_option,
-                "student_selected_option": selected_option
-            })
-    
-    logger.info(f"Created {len(merged_data)} student-question records")
-    
-    # Save merged.json
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(merged_data, f, indent=4)
+    
+    # Long format, one row per (question, student), question-major like the sheet
+    long_df = (
+        responses.T.rename_axis("student_id").reset_index()
+        .melt(id_vars="student_id", var_name="question_id", value_name="student_selected_option")
+    )
+    long_df["student_id"] = long_df["student_id"].astype(str)
+    long_df["question_id"] = long_df["question_id"].astype(int)
+    
+    # Normalize responses; empty or invalid responses become ""
+    selected = long_df["student_selected_option"]
+    selected = selected.where(selected.notna(), "").astype(str).str.strip().str.upper()
+    long_df["student_selected_option"] = selected.where(selected.isin(VALID_OPTIONS), "")
+    long_df["correct_option"] = long_df["question_id"].map(answer_map)
+    
+    # Attach question details column by column; questions missing from the paper are dropped
+    long_df = long_df[long_df["question_id"].isin(question_df.index)]
+    record_questions = long_df["question_id"]
+    long_df = long_df.assign(**{field: _map_question_field(record_questions, question_df[field])
+                                for field in QUESTION_FIELDS})
+    
+    logger.info(f"Created {len(long_df)} student-question records")
+    
+    # Save merged.json, encoding one student-question record at a time
+    with open(output_path, 'wb') as f:
+        # Machine-consumed: compact unless debugging
+        _write_json_array(f, _iter_records(long_df[MERGED_COLUMNS]), pretty=Config.DEBUG)
         
     logger.info(f"Saved merged data to {output_path}")
 
@@ -6,9 +6,10 @@ Calculates topic metadata and separates strength/weakness questions
 import json
 import os
 from collections import defaultdict
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable
 from src.config import Config
 from src.utils.logger import setup_logger
+from src.utils.json_helper import iter_json_array
 
 logger = setup_logger(__name__)
 
@@ -16,14 +17,13 @@ logger = setup_logger(__name__)
 def determine_correctness(correct_option: str, student_selected: str) -> str:
     """
     Determine if answer is correct, wrong, or unattempted
+    Both options are already canonical in merged.json (merge_data emits
+    uppercase "A"-"D" or "" for unattempted), so they are compared as-is.
     Returns: 'correct', 'wrong', or 'unattempted'
     """
-    if not student_selected or student_selected.strip() == "":
+    if not student_selected:
         return "unattempted"
-    elif correct_option.strip().upper() == student_selected.strip().upper():
-        return "correct"
-    else:
-        return "wrong"
+    return "correct" if correct_option == student_selected else "wrong"
 
 
 def build_question_object(question_data: Dict) -> Dict:
@@ -37,18 +37,27 @@ def build_question_object(question_data: Dict) -> Dict:
     }
 
 
-def calculate_topic_metadata(topic_questions: List[Dict]) -> Dict:
-    """Calculate topic-level accuracy and attempt ratio"""
+def calculate_topic_metadata(topic_questions: List[Dict], correctness: List[str] = None) -> Dict:
+    """
+    Calculate topic-level accuracy and attempt ratio
+    correctness: optional precomputed determine_correctness() label per question
+    """
     total = len(topic_questions)
     if total == 0:
         return {"topic_accuracy": 0, "attempt_ratio": 0, "question_count": 0}
     
-    correct_count = sum(1 for q in topic_questions 
-                       if determine_correctness(q.get("correct_option"), 
-                                               q.get("student_selected_option")) == "correct")
-    attempted_count = sum(1 for q in topic_questions 
-                         if determine_correctness(q.get("correct_option"), 
-                                                 q.get("student_selected_option")) != "unattempted")
+    if correctness is None:
+        correctness = [determine_correctness(q.get("correct_option"), q.get("student_selected_option"))
+                       for q in topic_questions]
+    
+    # Single pass over the labels
+    correct_count = 0
+    attempted_count = 0
+    for label in correctness:
+        if label == "correct":
+            correct_count += 1
+        if label != "unattempted":
+            attempted_count += 1
     
     topic_accuracy = round((correct_count / total) * 100, 2) if total > 0 else 0
     attempt_ratio = round((attempted_count / total) * 100, 2) if total > 0 else 0
@@ -60,58 +69,54 @@ def calculate_topic_metadata(topic_questions: List[Dict]) -> Dict:
     }
 
 
-def group_by_student_subject_topic(merged_data: List[Dict], test_name: str) -> Dict[str, List[Dict]]:
+def group_by_student_subject_topic(merged_data: Iterable[Dict], test_name: str) -> Dict[str, List[Dict]]:
     """
     Groups merged data by student_id → subject → topic
+    merged_data may be any iterable of records, e.g. iter_json_array(merged_path)
     Returns: {student_id: [subject_chunks]}
     where each subject_chunk is ready for LLM input
     """
-    # First level: group by student
-    student_data = defaultdict(list)
+    # Single pass: student → subject → topic (insertion order = first appearance)
+    student_data = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+    record_count = 0
     
     for record in merged_data:
+        record_count += 1
         student_id = str(record.get("student_id", ""))
         if student_id:
-            student_data[student_id].append(record)
+            subject = record.get("subject", "Unknown")
+            topic = record.get("topic", "Unknown")
+            student_data[student_id][subject][topic].append(record)
     
+    logger.info(f"Loaded {record_count} records from merged.json")
     logger.info(f"Grouped data for {len(student_data)} students")
     
     # Process each student
     student_subject_chunks = {}
     
-    for student_id, questions in student_data.items():
-        # Group by subject
-        subject_data = defaultdict(list)
-        for q in questions:
-            subject = q.get("subject", "Unknown")
-            subject_data[subject].append(q)
-        
-        # For each subject, group by topic
+    for student_id, subject_data in student_data.items():
+        # For each subject, build its topics
         subject_chunks = []
         
-        for subject, subject_questions in subject_data.items():
-            topic_data = defaultdict(list)
-            for q in subject_questions:
-                topic = q.get("topic", "Unknown")
-                topic_data[topic].append(q)
-            
+        for subject, topic_data in subject_data.items():
             # Build topic structures
             topics = []
             for topic_name, topic_questions in topic_data.items():
+                # Classify each question once; reused for metadata and grouping
+                labels = [
+                    determine_correctness(q.get("correct_option"), q.get("student_selected_option"))
+                    for q in topic_questions
+                ]
+                
                 # Calculate metadata
-                metadata = calculate_topic_metadata(topic_questions)
+                metadata = calculate_topic_metadata(topic_questions, labels)
                 
                 # Separate into strength and weakness
                 correct_questions = []
                 wrong_questions = []
                 unattempted_questions = []
                 
-                for q in topic_questions:
-                    correctness = determine_correctness(
-                        q.get("correct_option"), 
-                        q.get("student_selected_option")
-                    )
-                    
+                for q, correctness in zip(topic_questions, labels):
                     question_obj = build_question_object(q)
                     
                     if correctness == "correct":
@@ -173,16 +178,11 @@ def process(target_class: str = None) -> Dict[str, List[Dict]]:
         logger.error(f"merged.json not found at {merged_path}")
         raise FileNotFoundError(f"merged.json not found: {merged_path}")
     
-    with open(merged_path, 'r', encoding='utf-8') as f:
-        merged_data = json.load(f)
-    
-    logger.info(f"Loaded {len(merged_data)} records from merged.json")
-    
     # Extract test name from class folder name or use default
     test_name = target_class.replace("class_", "").replace("_", " ").title()
     
-    # Group and structure data
-    student_chunks = group_by_student_subject_topic(merged_data, test_name)
+    # Stream records straight into the grouping
+    student_chunks = group_by_student_subject_topic(iter_json_array(merged_path), test_name)
     
     logger.info(f"Data processing complete: {len(student_chunks)} students ready for LLM analysis")
     
@@ -3,20 +3,27 @@ Phase 2 LLM Analyzer
 Sends subject chunks to LLM and processes responses
 """
 import json
-import time
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Tuple
+from src.config import Config
 from src.utils.llm_helper import setup_gemini, call_gemini_json
 from src.utils.logger import setup_logger
-from src.prompts import PHASE_2_NEW_ANALYSIS_PROMPT
+from src.utils.json_helper import json_dumps
+from src.utils.llm_cache import content_key, cache_get, cache_put
+from src.prompts import PHASE_2_NEW_ANALYSIS_PROMPT, PHASE_2_BATCH_ANALYSIS_PROMPT
 from src.phase2.output_writer import write_student_output
 
 logger = setup_logger(__name__)
 
+# Prompts whose replies are cached; each entry is keyed by the one that produced it
+_ANALYSIS_PROMPTS = (PHASE_2_NEW_ANALYSIS_PROMPT, PHASE_2_BATCH_ANALYSIS_PROMPT)
 
-def validate_and_repair_response(response: Any, subject_chunk: Dict) -> List[Dict]:
+
+def validate_and_repair_response(response: Any, subject_chunk: Dict) -> Tuple[List[Dict], bool]:
     """
     Validates LLM response and repairs if needed
-    Returns list of topic insights
+    Returns (topic insights, complete); complete is False when an item was
+    skipped or had fields filled in, i.e. the response is not worth caching
     """
     # Ensure response is a list
     if isinstance(response, dict):
@@ -25,28 +32,31 @@ def validate_and_repair_response(response: Any, subject_chunk: Dict) -> List[Dic
             response = [response]
         else:
             logger.warning("Invalid response structure, expected list or topic dict")
-            return []
+            return [], False
     
     if not isinstance(response, list):
         logger.warning(f"Expected list response, got {type(response)}")
-        return []
+        return [], False
     
     # Expected fields
     required_fields = ["test_name", "subject", "topic_name", 
                       "strength_insights", "weakness_insights", "learning_recommendations"]
     
     validated = []
+    complete = True
     topics_from_input = [t["topic_name"] for t in subject_chunk.get("topics", [])]
     
     for i, item in enumerate(response):
         if not isinstance(item, dict):
             logger.warning(f"Topic item {i} is not a dict, skipping")
+            complete = False
             continue
         
         # Check required fields
         missing = [f for f in required_fields if f not in item]
         if missing:
             logger.warning(f"Topic {i} missing fields: {missing}")
+            complete = False
             # Fill with fallbacks
             for field in missing:
                 if field == "test_name":
@@ -67,7 +77,78 @@ def validate_and_repair_response(response: Any, subject_chunk: Dict) -> List[Dic
         
         validated.append(item)
     
-    return validated
+    return validated, complete
+
+
+def _canonical_chunk(subject_chunk: Dict) -> str:
+    """Key-order-independent serialization of a subject chunk"""
+    return json.dumps(subject_chunk, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _cache_key(prompt: str, canonical_chunk: str) -> str:
+    """
+    Hash of the prompt that produced the insights and a subject chunk; students
+    with identical answers share a key, and editing the prompt retires every
+    entry it produced
+    """
+    return content_key(prompt, canonical_chunk)
+
+
+def _cache_get(subject_chunk: Dict) -> List[Dict] | None:
+    """
+    Returns cached insights for an identical subject chunk, or None
+    Entries produced by either current prompt (single or batch) are valid.
+    """
+    canonical = _canonical_chunk(subject_chunk)
+    for prompt in _ANALYSIS_PROMPTS:
+        cached = cache_get("phase2", _cache_key(prompt, canonical))
+        if cached is not None:
+            return cached
+    return None
+
+
+def _cache_put(subject_chunk: Dict, insights: List[Dict], prompt: str):
+    """
+    Stores validated insights (without topic metadata, which is re-merged on read)
+    under the prompt that was actually sent
+    """
+    stored = [{k: v for k, v in insight.items() if k != "topic_metadata"} for insight in insights]
+    cache_put("phase2", _cache_key(prompt, _canonical_chunk(subject_chunk)), stored)
+
+
+def _fallback_insights(subject_chunk: Dict, metadata_map: Dict, strength: str,
+                       weakness: str, recommendation: str) -> List[Dict]:
+    """Builds placeholder insights for every topic of a subject chunk"""
+    fallback = []
+    for topic in subject_chunk.get("topics", []):
+        topic_name = topic.get("topic_name", "Unknown")
+        fallback.append({
+            "test_name": subject_chunk.get("test_name", "Unknown"),
+            "subject": subject_chunk.get("subject", "Unknown"),
+            "topic_name": topic_name,
+            "topic_metadata": metadata_map.get(topic_name, {}),
+            "strength_insights": [strength],
+            "weakness_insights": [weakness],
+            "learning_recommendations": [recommendation]
+        })
+    return fallback
+
+
+def _metadata_map(subject_chunk: Dict) -> Dict[str, Dict]:
+    """Extract metadata map: topic_name -> metadata"""
+    return {topic.get("topic_name", "Unknown"): topic.get("metadata", {})
+            for topic in subject_chunk.get("topics", [])}
+
+
+def _attach_metadata(validated_response: List[Dict], subject_chunk: Dict) -> List[Dict]:
+    """Merges topic metadata into validated insights"""
+    metadata_map = _metadata_map(subject_chunk)
+    for insight in validated_response:
+        topic_name = insight.get("topic_name", "Unknown")
+        insight["topic_metadata"] = metadata_map.get(topic_name, {})
+    
+    logger.info(f"Successfully analyzed {subject_chunk.get('subject', 'Unknown')} with {len(validated_response)} topics")
+    return validated_response
 
 
 def analyze_subject_chunk(subject_chunk: Dict, student_id: str) -> List[Dict]:
@@ -75,71 +156,111 @@ def analyze_subject_chunk(subject_chunk: Dict, student_id: str) -> List[Dict]:
     Sends one subject chunk to LLM and returns topic insights with metadata
     """
     subject = subject_chunk.get("subject", "Unknown")
-    logger.info(f"Analyzing {subject} for student {student_id}...")
     
-    # Extract metadata map: topic_name -> metadata
-    metadata_map = {}
-    for topic in subject_chunk.get("topics", []):
-        topic_name = topic.get("topic_name", "Unknown")
-        metadata_map[topic_name] = topic.get("metadata", {})
+    cached = _cache_get(subject_chunk)
+    if cached is not None:
+        logger.info(f"Using cached analysis of {subject} for student {student_id}")
+        return _attach_metadata(cached, subject_chunk)
+    
+    logger.info(f"Analyzing {subject} for student {student_id}...")
     
     try:
-        # Prepare content
-        content = json.dumps(subject_chunk, indent=2)
+        # Prepare content (compact: indentation only adds prompt tokens)
+        content = json_dumps(subject_chunk).decode("utf-8")
         
         # Call LLM
         response = call_gemini_json(PHASE_2_NEW_ANALYSIS_PROMPT, content)
         
         # Validate and repair
-        validated_response = validate_and_repair_response(response, subject_chunk)
+        validated_response, complete = validate_and_repair_response(response, subject_chunk)
         
         if not validated_response:
             logger.error(f"Failed to get valid response for {subject}, student {student_id}")
             # Return fallback for each topic
-            fallback = []
-            for topic in subject_chunk.get("topics", []):
-                topic_name = topic.get("topic_name", "Unknown")
-                fallback.append({
-                    "test_name": subject_chunk.get("test_name", "Unknown"),
-                    "subject": subject,
-                    "topic_name": topic_name,
-                    "topic_metadata": metadata_map.get(topic_name, {}),
-                    "strength_insights": ["Insufficient data available."],
-                    "weakness_insights": ["Insufficient data available."],
-                    "learning_recommendations": ["Insufficient data available."]
-                })
-            return fallback
+            return _fallback_insights(subject_chunk, _metadata_map(subject_chunk), "Insufficient data available.",
+                                      "Insufficient data available.", "Insufficient data available.")
         
-        # Merge metadata into validated response
-        for insight in validated_response:
-            topic_name = insight.get("topic_name", "Unknown")
-            insight["topic_metadata"] = metadata_map.get(topic_name, {})
+        # Repaired answers are used for this run only; caching them would
+        # serve the filler sentences on every rerun
+        if complete:
+            _cache_put(subject_chunk, validated_response, PHASE_2_NEW_ANALYSIS_PROMPT)
         
-        logger.info(f"Successfully analyzed {subject} with {len(validated_response)} topics")
-        return validated_response
+        # Merge metadata into validated response
+        return _attach_metadata(validated_response, subject_chunk)
         
     except Exception as e:
         logger.error(f"Error analyzing {subject} for student {student_id}: {e}")
         # Return fallback
-        fallback = []
-        for topic in subject_chunk.get("topics", []):
-            topic_name = topic.get("topic_name", "Unknown")
-            fallback.append({
-                "test_name": subject_chunk.get("test_name", "Unknown"),
-                "subject": subject,
-                "topic_name": topic_name,
-                "topic_metadata": metadata_map.get(topic_name, {}),
-                "strength_insights": ["Analysis failed due to error."],
-                "weakness_insights": ["Analysis failed due to error."],
-                "learning_recommendations": ["Please review manually."]
-            })
-        return fallback
+        return _fallback_insights(subject_chunk, _metadata_map(subject_chunk), "Analysis failed due to error.",
+                                  "Analysis failed due to error.", "Please review manually.")
+
+
+def analyze_student_batch(subject_chunks: List[Dict], student_id: str) -> List[List[Dict]]:
+    """
+    Sends all of a student's subject chunks to LLM in a single call
+    Returns topic insights per subject chunk, in input order. Cached subjects
+    are skipped; subjects the batched response does not cover are re-sent
+    individually.
+    """
+    results = [None] * len(subject_chunks)
+    
+    # Subjects already analyzed for an identical chunk are served from the cache
+    misses = []
+    for pos, subject_chunk in enumerate(subject_chunks):
+        cached = _cache_get(subject_chunk)
+        if cached is not None:
+            results[pos] = _attach_metadata(cached, subject_chunk)
+        else:
+            misses.append(pos)
+    
+    if len(misses) <= 1:
+        for pos in misses:
+            results[pos] = analyze_subject_chunk(subject_chunks[pos], student_id)
+        return results
+    
+    batch = [subject_chunks[pos] for pos in misses]
+    logger.info(f"Analyzing {len(batch)} subjects for student {student_id} in one call...")
+    
+    try:
+        content = json_dumps(batch).decode("utf-8")
+        response = call_gemini_json(PHASE_2_BATCH_ANALYSIS_PROMPT, content)
+    except Exception as e:
+        logger.error(f"Batched analysis failed for student {student_id}: {e}. Retrying per subject")
+        response = None
+    
+    # Expected: one output array per input subject, same order
+    per_subject = [None] * len(batch)
+    if isinstance(response, list) and len(response) == len(batch) \
+            and all(isinstance(part, list) for part in response):
+        per_subject = response
+    elif isinstance(response, list):
+        # Flat list of topic objects: split by subject name
+        by_subject = {}
+        for item in response:
+            if isinstance(item, dict):
+                by_subject.setdefault(item.get("subject"), []).append(item)
+        per_subject = [by_subject.get(chunk.get("subject")) for chunk in batch]
+    
+    for pos, subject_chunk, part in zip(misses, batch, per_subject):
+        validated_response, complete = (validate_and_repair_response(part, subject_chunk) if part
+                                        else ([], False))
+        if validated_response:
+            if complete:
+                _cache_put(subject_chunk, validated_response, PHASE_2_BATCH_ANALYSIS_PROMPT)
+            results[pos] = _attach_metadata(validated_response, subject_chunk)
+        else:
+            results[pos] = analyze_subject_chunk(subject_chunk, student_id)
+    return results
 
 
 def process(student_chunks: Dict[str, List[Dict]], target_class: str = None) -> int:
     """
     Process all students' subject chunks through LLM
-    Writes each student's output immediately after completion
+    Each student's subjects go out as one batched call; students are analyzed
+    concurrently (bounded by Config.LLM_CONCURRENCY; request starts are paced to
+    Config.LLM_REQUESTS_PER_MINUTE and rate-limit errors are retried with backoff
+    in llm_helper). Each student's output is written as
+    soon as their analysis completes.
     Returns: count of students processed
     """
     setup_gemini()
@@ -149,24 +270,24 @@ def process(student_chunks: Dict[str, List[Dict]], target_class: str = None) ->
     
     logger.info(f"Starting LLM analysis for {total_students} students")
     
-    for idx, (student_id, subject_chunks) in enumerate(student_chunks.items(), 1):
-        logger.info(f"[{idx}/{total_students}] Processing student {student_id} with {len(subject_chunks)} subjects")
-        
-        student_insights = []
-        
-        for subject_chunk in subject_chunks:
-            # Analyze this subject
-            topic_insights = analyze_subject_chunk(subject_chunk, student_id)
-            student_insights.extend(topic_insights)
+    if total_students:
+        max_workers = max(1, min(total_students, Config.LLM_CONCURRENCY))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(analyze_student_batch, subject_chunks, student_id): student_id
+                for student_id, subject_chunks in student_chunks.items()
+            }
             
-            # Rate limiting
-            time.sleep(1)
-        
-        # Write student file immediately
-        write_student_output(student_id, student_insights, target_class)
-        processed_count += 1
-        
-        logger.info(f"Completed student {student_id}: {len(student_insights)} topic insights, file written")
+            for future in as_completed(futures):
+                student_id = futures[future]
+                student_insights = [insight for topic_insights in future.result() for insight in topic_insights]
+                
+                # Write student file immediately
+                write_student_output(student_id, student_insights, target_class)
+                processed_count += 1
+                
+                logger.info(f"[{processed_count}/{total_students}] Completed student {student_id}: "
+                            f"{len(student_insights)} topic insights, file written")
     
     logger.info(f"LLM analysis complete for all {total_students} students")
     return processed_count
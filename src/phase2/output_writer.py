@@ -2,15 +2,20 @@
 Phase 2 Output Writer
 Writes student-level JSON files (global, not tied to class/phase/batch structure)
 """
-import json
 import os
 from typing import Dict, List
 from src.config import Config
 from src.utils.logger import setup_logger
+from src.utils.json_helper import load_json_file, dump_json_file
 
 logger = setup_logger(__name__)
 
 
+def _insight_key(insight: Dict) -> tuple:
+    """Identity of an insight within a student file"""
+    return (insight.get("test_name", ""), insight.get("topic_name", ""))
+
+
 def write_student_output(student_id: str, insights: List[Dict], target_class: str = None):
     """
     Writes a single student's insights to a JSON file
@@ -25,29 +30,31 @@ def write_student_output(student_id: str, insights: List[Dict], target_class: st
     
     # Load existing insights if file exists
     existing_insights = []
+    existing_loaded = False
     if os.path.exists(output_path):
         try:
-            with open(output_path, 'r', encoding='utf-8') as f:
-                existing_data = json.load(f)
-                existing_insights = existing_data.get("insights", [])
+            existing_data = load_json_file(output_path)
+            existing_insights = existing_data.get("insights", [])
+            existing_loaded = True
         except Exception as e:
             logger.warning(f"Could not load existing file for student {student_id}: {e}. Will overwrite.")
             existing_insights = []
     
-    # Build set of existing (test_name, topic_name) keys
-    existing_keys = set()
-    for insight in existing_insights:
-        key = (insight.get("test_name", ""), insight.get("topic_name", ""))
-        existing_keys.add(key)
-    
-    # Filter new insights: only append if (test_name, topic_name) not in existing
-    new_count = 0
+    # First write wins: a (test_name, topic_name) already recorded is kept as-is.
+    # Existing entries are all kept, even if the file already holds duplicates
+    recorded_keys = {_insight_key(insight) for insight in existing_insights}
+    total_before = len(existing_insights)
     for insight in insights:
-        key = (insight.get("test_name", ""), insight.get("topic_name", ""))
-        if key not in existing_keys:
+        key = _insight_key(insight)
+        if key not in recorded_keys:
+            recorded_keys.add(key)
             existing_insights.append(insight)
-            existing_keys.add(key)
-            new_count += 1
+    new_count = len(existing_insights) - total_before
+    
+    # Re-running a test that is already recorded adds nothing; leave the file untouched
+    if new_count == 0 and existing_loaded:
+        logger.info(f"No new insights for student {student_id}, {total_before} total; file unchanged")
+        return
     
     # Write merged data
     output_data = {
@@ -55,8 +62,7 @@ def write_student_output(student_id: str, insights: List[Dict], target_class: st
         "insights": existing_insights
     }
     
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=2, ensure_ascii=False)
+    dump_json_file(output_data, output_path, pretty=Config.DEBUG)
     
     logger.info(f"Wrote output for student {student_id}: {new_count} new insights appended, {len(existing_insights)} total")
 
@@ -76,8 +82,7 @@ def write_index_file(student_ids: List[str], target_class: str = None):
         "class": target_class or Config.DEFAULT_CLASS
     }
     
-    with open(index_path, 'w', encoding='utf-8') as f:
-        json.dump(index_data, f, indent=2)
+    dump_json_file(index_data, index_path, pretty=True)
     
     logger.info(f"Wrote index file: {index_path} with {len(student_ids)} students")
 
@@ -6,11 +6,17 @@ import json
 import os
 from typing import Dict, List
 from collections import defaultdict
+from types import MappingProxyType
 from src.config import Config
 from src.utils.logger import setup_logger
+from src.utils.json_helper import load_json_file, list_student_files
+from src.utils.pools import get_io_pool
 
 logger = setup_logger(__name__)
 
+# Shared read-only fallback for insights without topic_metadata
+_EMPTY_METADATA = MappingProxyType({})
+
 
 def group_by_topic(student_data: Dict) -> Dict[str, List[Dict]]:
     """
@@ -28,14 +34,16 @@ def group_by_topic(student_data: Dict) -> Dict[str, List[Dict]]:
     
     for insight in insights:
         topic_name = insight.get("topic_name", "Unknown")
+        # Looked up once per insight rather than once per metadata field
+        metadata = insight.get("topic_metadata") or _EMPTY_METADATA
         
         # Extract relevant data for pattern analysis
         topic_record = {
             "test_name": insight.get("test_name", "Unknown"),
             "subject": insight.get("subject", "Unknown"),
-            "topic_accuracy": insight.get("topic_metadata", {}).get("topic_accuracy", 0),
-            "attempt_ratio": insight.get("topic_metadata", {}).get("attempt_ratio", 0),
-            "question_count": insight.get("topic_metadata", {}).get("question_count", 0),
+            "topic_accuracy": metadata.get("topic_accuracy", 0),
+            "attempt_ratio": metadata.get("attempt_ratio", 0),
+            "question_count": metadata.get("question_count", 0),
             "strength_insights": insight.get("strength_insights", []),
             "weakness_insights": insight.get("weakness_insights", []),
             "learning_recommendations": insight.get("learning_recommendations", [])
@@ -46,10 +54,14 @@ def group_by_topic(student_data: Dict) -> Dict[str, List[Dict]]:
     return dict(topic_groups)
 
 
-def load_all_students() -> Dict[str, Dict]:
+def load_all_students(raw_docs: Dict[str, Dict] = None) -> Dict[str, Dict]:
     """
     Loads all student JSON files from output/students/
     
+    Args:
+        raw_docs: Optional dict filled with student_id -> parsed file, so the
+            output writer can update the documents without re-reading them
+    
     Returns:
         Dict[student_id, grouped_topic_data]
     """
@@ -59,8 +71,7 @@ def load_all_students() -> Dict[str, Dict]:
         logger.error(f"Students directory not found: {students_dir}")
         return {}
     
-    student_files = [f for f in os.listdir(students_dir) 
-                     if f.endswith('.json') and f != '_index.json']
+    student_files = list_student_files(students_dir)
     
     if not student_files:
         logger.warning(f"No student JSON files found in {students_dir}")
@@ -68,14 +79,15 @@ def load_all_students() -> Dict[str, Dict]:
     
     logger.info(f"Found {len(student_files)} student files")
     
-    all_students = {}
+    # Join the directory once; each file only appends its leaf name
+    students_prefix = students_dir + os.sep
     
-    for filename in student_files:
-        filepath = os.path.join(students_dir, filename)
+    def load_one(filename):
+        """Loads and topic-groups one student file; None when unusable"""
+        filepath = students_prefix + filename
         
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                student_data = json.load(f)
+            student_data = load_json_file(filepath)
             
             student_id = student_data.get("student_id", filename.replace('.json', ''))
             
@@ -83,29 +95,40 @@ def load_all_students() -> Dict[str, Dict]:
             topic_grouped = group_by_topic(student_data)
             
             if topic_grouped:
-                all_students[student_id] = topic_grouped
                 logger.info(f"Loaded student {student_id}: {len(topic_grouped)} topics")
-            else:
-                logger.warning(f"Student {student_id} has no topic data")
+                return student_id, topic_grouped, student_data
+            logger.warning(f"Student {student_id} has no topic data")
                 
         except Exception as e:
             logger.error(f"Failed to load {filename}: {e}")
-            continue
+        return None
+    
+    # File reads are I/O-bound and independent; map() preserves the (inode-sorted) input order
+    all_students = {}
+    for loaded in get_io_pool().map(load_one, student_files):
+        if loaded:
+            student_id, topic_grouped, student_data = loaded
+            all_students[student_id] = topic_grouped
+            if raw_docs is not None:
+                raw_docs[student_id] = student_data
     
     logger.info(f"Successfully loaded {len(all_students)} students with topic-grouped data")
     return all_students
 
 
-def process() -> Dict[str, Dict]:
+def process(raw_docs: Dict[str, Dict] = None) -> Dict[str, Dict]:
     """
     Main entry point for Phase 3 data aggregation
     
+    Args:
+        raw_docs: Optional dict filled with the parsed student files (see load_all_students)
+    
     Returns:
         Dict[student_id, Dict[topic_name, List[test_records]]]
     """
     logger.info("Starting Phase 3 Data Aggregation")
     
-    student_data = load_all_students()
+    student_data = load_all_students(raw_docs)
     
     if not student_data:
         logger.error("No student data loaded. Phase 3 cannot proceed.")
@@ -4,20 +4,27 @@ Analyzes topic-wise patterns across tests for each student
 One LLM call per student to identify top 5 actionable insights
 """
 import json
-import time
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any, Tuple
+from src.config import Config
 from src.utils.llm_helper import setup_gemini, call_gemini_json
+from src.utils.llm_cache import content_key, cache_get, cache_put
+from src.utils.json_helper import json_dumps
 from src.utils.logger import setup_logger
 from src.prompts import PHASE_3_PATTERN_ANALYSIS_PROMPT
 
 logger = setup_logger(__name__)
 
 
-def validate_and_repair_insights(response: Any, student_id: str) -> List[Dict]:
+def validate_and_repair_insights(response: Any, student_id: str) -> Tuple[List[Dict], bool]:
     """
     Validates LLM response and repairs if needed
     Expected: list of exactly 5 insights
     Each insight must have: insight, recommendation, citation
+    
+    Returns:
+        (insights, complete): complete is False when any item had to be
+        filled in, dropped, padded or truncated, i.e. not worth caching
     """
     # Ensure response is a list
     if isinstance(response, dict):
@@ -30,21 +37,24 @@ def validate_and_repair_insights(response: Any, student_id: str) -> List[Dict]:
     
     if not isinstance(response, list):
         logger.error(f"Student {student_id}: Expected list response, got {type(response)}")
-        return []
+        return [], False
     
     # Validate each insight
     required_fields = ["insight", "recommendation", "citation"]
     validated = []
+    complete = len(response) == 5
     
     for i, item in enumerate(response):
         if not isinstance(item, dict):
             logger.warning(f"Student {student_id}: Insight {i} is not a dict, skipping")
+            complete = False
             continue
         
         # Check required fields
         missing = [f for f in required_fields if f not in item or not item[f]]
         if missing:
             logger.warning(f"Student {student_id}: Insight {i} missing fields: {missing}")
+            complete = False
             # Fill with fallbacks
             if "insight" not in item or not item["insight"]:
                 item["insight"] = f"Pattern analysis incomplete for insight {i+1}"
@@ -73,7 +83,7 @@ def validate_and_repair_insights(response: Any, student_id: str) -> List[Dict]:
         logger.warning(f"Student {student_id}: {len(validated)} insights returned, truncating to top 5")
         validated = validated[:5]
     
-    return validated
+    return validated, complete
 
 
 def analyze_student_patterns(student_id: str, topic_data: Dict[str, List[Dict]]) -> List[Dict]:
@@ -90,14 +100,22 @@ def analyze_student_patterns(student_id: str, topic_data: Dict[str, List[Dict]])
     logger.info(f"Analyzing patterns for student {student_id} with {len(topic_data)} topics")
     
     try:
-        # Prepare content for LLM
-        content = json.dumps(topic_data, indent=2, ensure_ascii=False)
+        # Prepare content for LLM (compact: indentation only adds input tokens)
+        content = json_dumps(topic_data).decode("utf-8")
+        
+        # Unchanged data (report reruns) reuses the stored insights; editing
+        # the prompt changes the key, so stale entries are never returned
+        cache_key = content_key(PHASE_3_PATTERN_ANALYSIS_PROMPT, content)
+        cached = cache_get("phase3", cache_key)
+        if cached is not None:
+            logger.info(f"Student {student_id}: using cached pattern insights")
+            return cached
         
         # Call LLM
         response = call_gemini_json(PHASE_3_PATTERN_ANALYSIS_PROMPT, content)
         
         # Validate and repair
-        validated_insights = validate_and_repair_insights(response, student_id)
+        validated_insights, complete = validate_and_repair_insights(response, student_id)
         
         if len(validated_insights) != 5:
             logger.error(f"Student {student_id}: Failed to get exactly 5 insights after repair")
@@ -111,6 +129,10 @@ def analyze_student_patterns(student_id: str, topic_data: Dict[str, List[Dict]])
                 })
             return fallback
         
+        # Repaired (filled/padded/truncated) answers are not cached, so a
+        # rerun asks the LLM again instead of serving the placeholders forever
+        if complete:
+            cache_put("phase3", cache_key, validated_insights)
         logger.info(f"Successfully analyzed student {student_id}: 5 insights generated")
         return validated_insights
         
@@ -142,20 +164,24 @@ def process(student_data: Dict[str, Dict]) -> Dict[str, List[Dict]]:
     total_students = len(student_data)
     logger.info(f"Starting Phase 3 LLM analysis for {total_students} students")
     
-    all_insights = {}
-    
-    for idx, (student_id, topic_data) in enumerate(student_data.items(), 1):
-        logger.info(f"[{idx}/{total_students}] Processing student {student_id}")
-        
-        # Analyze this student (one LLM call)
-        insights = analyze_student_patterns(student_id, topic_data)
-        
-        all_insights[student_id] = insights
-        
-        # Rate limiting
-        time.sleep(1)
-        
-        logger.info(f"Completed student {student_id}: {len(insights)} insights")
+    # One LLM call per student, overlapped up to Config.LLM_CONCURRENCY; request
+    # pacing and 429/5xx backoff are handled in llm_helper
+    results = {}
+    if total_students:
+        max_workers = max(1, min(total_students, Config.LLM_CONCURRENCY))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(analyze_student_patterns, student_id, topic_data): student_id
+                for student_id, topic_data in student_data.items()
+            }
+            
+            for idx, future in enumerate(as_completed(futures), 1):
+                student_id = futures[future]
+                results[student_id] = future.result()
+                logger.info(f"[{idx}/{total_students}] Completed student {student_id}: {len(results[student_id])} insights")
+    
+    # Keep input order for downstream writers
+    all_insights = {student_id: results[student_id] for student_id in student_data}
     
     logger.info(f"Phase 3 LLM analysis complete for all {total_students} students")
     
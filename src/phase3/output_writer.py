@@ -2,17 +2,18 @@
 Phase 3 Output Writer
 Writes pattern analysis insights to individual student files and summary CSV
 """
-import json
 import os
 import csv
 from typing import Dict, List
 from src.config import Config
 from src.utils.logger import setup_logger
+from src.utils.json_helper import load_json_file, dump_json_file
+from src.utils.pools import get_io_pool
 
 logger = setup_logger(__name__)
 
 
-def write_student_insights(student_id: str, insights: List[Dict]):
+def write_student_insights(student_id: str, insights: List[Dict], base_doc: Dict = None):
     """
     Writes Phase 3 insights to student's JSON file
     Adds a 'pattern_insights' field without overwriting existing Phase 2 data
@@ -20,6 +21,7 @@ def write_student_insights(student_id: str, insights: List[Dict]):
     Args:
         student_id: Student identifier
         insights: List of 5 insight dictionaries
+        base_doc: Optional already-parsed student file; skips re-reading it from disk
     """
     students_dir = os.path.join(Config.OUTPUT_DIR, "students")
     os.makedirs(students_dir, exist_ok=True)
@@ -28,10 +30,11 @@ def write_student_insights(student_id: str, insights: List[Dict]):
     
     # Load existing student data
     student_data = {}
-    if os.path.exists(output_path):
+    if base_doc is not None:
+        student_data = base_doc
+    elif os.path.exists(output_path):
         try:
-            with open(output_path, 'r', encoding='utf-8') as f:
-                student_data = json.load(f)
+            student_data = load_json_file(output_path)
         except Exception as e:
             logger.warning(f"Could not load existing data for student {student_id}: {e}")
             student_data = {"student_id": student_id}
@@ -41,9 +44,8 @@ def write_student_insights(student_id: str, insights: List[Dict]):
     # Add pattern insights (Phase 3 data)
     student_data["pattern_insights"] = insights
     
-    # Write updated data
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(student_data, f, indent=2, ensure_ascii=False)
+    # Write updated data (compact; indented only when debugging)
+    dump_json_file(student_data, output_path, pretty=Config.DEBUG)
     
     logger.info(f"Wrote pattern insights for student {student_id}")
 
@@ -61,24 +63,20 @@ def write_summary_csv(all_insights: Dict[str, List[Dict]]):
     output_path = os.path.join(output_dir, "student_pattern_insights.csv")
     
     # CSV structure: student_id, insight_rank, insight, recommendation, citation
-    rows = []
-    
-    for student_id, insights in all_insights.items():
-        for rank, insight_data in enumerate(insights, 1):
-            rows.append({
-                "student_id": student_id,
-                "insight_rank": rank,
-                "insight": insight_data.get("insight", ""),
-                "recommendation": insight_data.get("recommendation", ""),
-                "citation": insight_data.get("citation", "")
-            })
+    # Rows go straight to csv.writer as tuples (no per-row dict for DictWriter)
+    rows = [
+        (student_id, rank, insight_data.get("insight", ""),
+         insight_data.get("recommendation", ""), insight_data.get("citation", ""))
+        for student_id, insights in all_insights.items()
+        for rank, insight_data in enumerate(insights, 1)
+    ]
     
     # Write CSV
     if rows:
         fieldnames = ["student_id", "insight_rank", "insight", "recommendation", "citation"]
         with open(output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
             writer.writerows(rows)
         
         logger.info(f"Wrote summary CSV: {output_path} with {len(rows)} rows")
@@ -86,18 +84,21 @@ def write_summary_csv(all_insights: Dict[str, List[Dict]]):
         logger.warning("No insights to write to CSV")
 
 
-def process(all_insights: Dict[str, List[Dict]]):
+def process(all_insights: Dict[str, List[Dict]], base_docs: Dict[str, Dict] = None):
     """
     Main entry point for Phase 3 output writing
     
     Args:
         all_insights: Dict[student_id, list_of_5_insights]
+        base_docs: Optional Dict[student_id, parsed student file] kept from
+            data_aggregator.process(raw_docs); students found there are not re-read
     """
+    base_docs = base_docs or {}
     logger.info(f"Writing Phase 3 outputs for {len(all_insights)} students")
     
-    # Write individual student files
-    for student_id, insights in all_insights.items():
-        write_student_insights(student_id, insights)
+    # Write individual student files (independent read-modify-write per file, in parallel)
+    list(get_io_pool().map(write_student_insights, all_insights.keys(), all_insights.values(),
+                           [base_docs.get(student_id) for student_id in all_insights]))
     
     # Write summary CSV
     write_summary_csv(all_insights)
@@ -3,12 +3,13 @@ Phase 4 Aggregator
 Aggregates student data across multiple classes/tests from merged.json files
 Creates student-wise JSON with all question records from all selected tests
 """
-import json
 import os
 from typing import Dict, List
 from collections import defaultdict
 from src.config import Config
 from src.utils.logger import setup_logger
+from src.utils.json_helper import iter_json_array, json_dumps
+from src.utils.pools import get_io_pool
 
 logger = setup_logger(__name__)
 
@@ -25,12 +26,11 @@ def discover_available_classes() -> List[str]:
     if not os.path.exists(Config.OUTPUT_DIR):
         return available
     
-    for folder in os.listdir(Config.OUTPUT_DIR):
-        folder_path = os.path.join(Config.OUTPUT_DIR, folder)
-        merged_path = os.path.join(folder_path, "phase1", "merged.json")
-        
-        if os.path.isdir(folder_path) and os.path.exists(merged_path):
-            available.append(folder)
+    # Directory check comes from the scandir entry; only class folders get probed for merged.json
+    with os.scandir(Config.OUTPUT_DIR) as entries:
+        for entry in entries:
+            if entry.is_dir() and os.path.exists(os.path.join(entry.path, "phase1", "merged.json")):
+                available.append(entry.name)
     
     return available
 
@@ -82,34 +82,48 @@ def prompt_for_classes() -> List[str]:
     return selected
 
 
-def load_merged_data(class_name: str) -> List[Dict]:
+def load_class_records(class_name: str) -> Dict[str, List[bytes]]:
     """
-    Loads merged.json for a specific class
+    Streams merged.json for a specific class, grouping records by student
+    Each record is tagged with test_name and kept only as its encoded JSON
+    bytes, so no dict graph is held for the whole cohort.
     
     Args:
         class_name: Class folder name
     
     Returns:
-        List of merged records
+        Dict[student_id, list_of_encoded_records] in file order
     """
     merged_path = os.path.join(Config.OUTPUT_DIR, class_name, "phase1", "merged.json")
     
     if not os.path.exists(merged_path):
         logger.warning(f"merged.json not found for {class_name}")
-        return []
+        return {}
+    
+    class_records = defaultdict(list)
+    record_count = 0
     
     try:
-        with open(merged_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        
-        logger.info(f"Loaded {len(data)} records from {class_name}")
-        return data
+        for record in iter_json_array(merged_path):
+            record_count += 1
+            student_id = str(record.get("student_id", ""))
+            
+            if not student_id:
+                logger.warning(f"Record without student_id in {class_name}, skipping")
+                continue
+            
+            # Add test_name field (use class name as test identifier)
+            record["test_name"] = class_name
+            class_records[student_id].append(json_dumps(record, pretty=Config.DEBUG))
     except Exception as e:
         logger.error(f"Failed to load merged.json for {class_name}: {e}")
-        return []
+        return {}
+    
+    logger.info(f"Loaded {record_count} records from {class_name}")
+    return class_records
 
 
-def aggregate_by_student(selected_classes: List[str]) -> Dict[str, List[Dict]]:
+def aggregate_by_student(selected_classes: List[str]) -> Dict[str, List[bytes]]:
     """
     Aggregates all merged records by student across selected classes
     
@@ -117,66 +131,93 @@ def aggregate_by_student(selected_classes: List[str]) -> Dict[str, List[Dict]]:
         selected_classes: List of class folder names
     
     Returns:
-        Dict[student_id, list_of_all_records_with_test_name]
+        Dict[student_id, list_of_all_records_with_test_name], each record as
+        encoded JSON bytes (see load_class_records)
     """
     student_records = defaultdict(list)
     
-    for class_name in selected_classes:
+    # Stream all classes' merged.json concurrently (I/O-bound); map() keeps class order
+    loaded = list(get_io_pool().map(load_class_records, selected_classes))
+    
+    for class_name, class_records in zip(selected_classes, loaded):
         logger.info(f"Processing {class_name}...")
         
-        merged_data = load_merged_data(class_name)
-        
-        if not merged_data:
+        if not class_records:
             logger.warning(f"Skipping {class_name} (no data)")
             continue
         
-        # Add test_name and group by student
-        for record in merged_data:
-            student_id = str(record.get("student_id", ""))
-            
-            if not student_id:
-                logger.warning(f"Record without student_id in {class_name}, skipping")
-                continue
-            
-            # Add test_name field (use class name as test identifier)
-            record_with_test = record.copy()
-            record_with_test["test_name"] = class_name
-            
-            student_records[student_id].append(record_with_test)
+        for student_id, records in class_records.items():
+            student_records[student_id].extend(records)
     
     return dict(student_records)
 
 
-def write_student_files(student_data: Dict[str, List[Dict]]):
+def _encode_student_file(student_id: str, records: List[bytes]) -> bytes:
+    """
+    Assembles a student file from pre-encoded records
+    Same bytes as json_dumps({"student_id", "total_records", "records"}, pretty=Config.DEBUG);
+    records must have been encoded with the same pretty setting.
+    """
+    if not Config.DEBUG:
+        return (b'{"student_id":' + json_dumps(student_id)
+                + b',"total_records":' + str(len(records)).encode()
+                + b',"records":[' + b",".join(records) + b"]}")
+    
+    # Encoded records are 2-space indented at top level; nest them two levels deeper
+    if records:
+        body = b"[\n    " + b",\n    ".join(r.replace(b"\n", b"\n    ") for r in records) + b"\n  ]"
+    else:
+        body = b"[]"
+    return (b'{\n  "student_id": ' + json_dumps(student_id)
+            + b',\n  "total_records": ' + str(len(records)).encode()
+            + b',\n  "records": ' + body + b"\n}")
+
+
+def write_student_files(student_data: Dict[str, List[bytes]]):
     """
     Writes individual student JSON files to output/phase4/students/
     
     Args:
-        student_data: Dict[student_id, list_of_records]
+        student_data: Dict[student_id, list_of_encoded_records]
     """
     output_dir = os.path.join(Config.OUTPUT_DIR, "phase4", "students")
     os.makedirs(output_dir, exist_ok=True)
     
     logger.info(f"Writing {len(student_data)} student files...")
     
-    for student_id, records in student_data.items():
-        output_path = os.path.join(output_dir, f"{student_id}.json")
-        
-        student_json = {
-            "student_id": student_id,
-            "total_records": len(records),
-            "records": records
-        }
+    # Join the directory once; each file only appends its leaf name
+    output_prefix = output_dir + os.sep
+    
+    def write_one(student_id, records):
+        """Serializes and writes one student file (a single write() per file)"""
+        output_path = output_prefix + student_id + ".json"
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(student_json, f, indent=2, ensure_ascii=False)
+        with open(output_path, 'wb') as f:
+            f.write(_encode_student_file(student_id, records))
         
         logger.info(f"Wrote {student_id}.json with {len(records)} records")
     
+    # One file per student, no shared state: write them in parallel
+    # Create files in name order so directory entries are appended monotonically;
+    # list() surfaces any write error
+    ordered_ids = sorted(student_data)
+    list(get_io_pool().map(write_one, ordered_ids, [student_data[sid] for sid in ordered_ids]))
+    
     logger.info(f"Successfully wrote {len(student_data)} student files")
 
 
-def write_index_file(student_data: Dict[str, List[Dict]], selected_classes: List[str]):
+def _write_index_items(f, items, brackets: bytes, pretty: bool):
+    """Writes encoded items as an array/object nested one level deep (2-space indent when pretty)"""
+    opening, closing = brackets[:1], brackets[1:]
+    lead = b"\n    " if pretty else b""
+    first = True
+    for item in items:
+        f.write((opening if first else b",") + lead + item)
+        first = False
+    f.write(brackets if first else (b"\n  " if pretty else b"") + closing)
+
+
+def write_index_file(student_data: Dict[str, List[bytes]], selected_classes: List[str]):
     """
     Writes index file with summary information
     
@@ -189,28 +230,33 @@ def write_index_file(student_data: Dict[str, List[Dict]], selected_classes: List
     
     index_path = os.path.join(output_dir, "_index.json")
     
-    index_data = {
-        "total_students": len(student_data),
-        "student_ids": sorted(list(student_data.keys())),
-        "classes_included": selected_classes,
-        "records_per_student": {
-            student_id: len(records) 
-            for student_id, records in student_data.items()
-        }
-    }
-    
-    with open(index_path, 'w', encoding='utf-8') as f:
-        json.dump(index_data, f, indent=2)
+    # Streamed entry by entry instead of building the index dict and encoding it whole;
+    # the bytes match json_dumps(index_data, pretty=Config.DEBUG)
+    pretty = Config.DEBUG
+    indent = b"\n  " if pretty else b""
+    colon = b": " if pretty else b":"
+    with open(index_path, 'wb') as f:
+        f.write(b"{" + indent + b'"total_students"' + colon + str(len(student_data)).encode()
+                + b"," + indent + b'"student_ids"' + colon)
+        _write_index_items(f, (json_dumps(student_id) for student_id in sorted(student_data)),
+                           b"[]", pretty)
+        f.write(b"," + indent + b'"classes_included"' + colon)
+        _write_index_items(f, (json_dumps(class_name) for class_name in selected_classes),
+                           b"[]", pretty)
+        f.write(b"," + indent + b'"records_per_student"' + colon)
+        _write_index_items(f, (json_dumps(student_id) + colon + str(len(records)).encode()
+                               for student_id, records in student_data.items()), b"{}", pretty)
+        f.write(b"\n}" if pretty else b"}")
     
     logger.info(f"Wrote index file: {index_path}")
 
 
-def process() -> Dict[str, List[Dict]]:
+def process() -> Dict[str, List[bytes]]:
     """
     Main entry point for Phase 4 aggregation
     
     Returns:
-        Dict[student_id, list_of_records]
+        Dict[student_id, list_of_encoded_records]
     """
     logger.info("Starting Phase 4: Multi-Test Student Aggregation")
     
@@ -254,4 +300,4 @@ if __name__ == "__main__":
         print(f"\nSample: Student {sample_student}")
         print(f"Total records: {len(data[sample_student])}")
         print(f"First record preview:")
-        print(json.dumps(data[sample_student][0], indent=2)[:500])
+        print(data[sample_student][0].decode('utf-8')[:500])
@@ -5,13 +5,22 @@ Filters wrong questions and groups by topic with comprehensive metrics
 import json
 import os
 from typing import Dict, List
-from collections import defaultdict
+from functools import lru_cache
+from operator import itemgetter
 from src.config import Config
 from src.utils.logger import setup_logger
+from src.utils.json_helper import load_json_file, list_student_files
+from src.utils.pools import get_cpu_pool
 
 logger = setup_logger(__name__)
 
 
+@lru_cache(maxsize=256)
+def _normalize_option(value) -> str:
+    """Canonical option text; options come from a handful of values ("A"-"D", "")"""
+    return str(value).strip().upper()
+
+
 def is_wrong_question(record: Dict) -> bool:
     """
     Determines if a question was answered incorrectly
@@ -22,26 +31,24 @@ def is_wrong_question(record: Dict) -> bool:
     Returns:
         True if wrong or unattempted
     """
-    correct = str(record.get("correct_option", "")).strip().upper()
-    selected = str(record.get("student_selected_option", "")).strip().upper()
+    correct = _normalize_option(record.get("correct_option", ""))
+    selected = _normalize_option(record.get("student_selected_option", ""))
     
     # Consider both wrong answers and unattempted as "wrong"
     return selected != correct or not selected
 
 
-def calculate_topic_metrics(all_questions: List[Dict], wrong_questions: List[Dict]) -> Dict:
+def calculate_topic_metrics(total: int, wrong_count: int) -> Dict:
     """
     Calculate comprehensive metrics for a topic
     
     Args:
-        all_questions: All questions in this topic
-        wrong_questions: Wrong questions in this topic
+        total: Number of questions in this topic
+        wrong_count: Number of wrong questions in this topic
     
     Returns:
         Dict with accuracy, weighted_accuracy, total_questions
     """
-    total = len(all_questions)
-    wrong_count = len(wrong_questions)
     correct_count = total - wrong_count
     
     accuracy = round((correct_count / total) * 100, 2) if total > 0 else 0
@@ -60,6 +67,34 @@ def calculate_topic_metrics(all_questions: List[Dict], wrong_questions: List[Dic
     }
 
 
+# Phase4 records always carry these fields, so fetch them in one C-level call
+_get_detail_fields = itemgetter("question_id", "question_text", "options_map",
+                                "correct_option", "student_selected_option", "test_name")
+
+
+def _wrong_question_detail(record: Dict) -> Dict:
+    """Wrong-question entry for the Phase 5 output (defaults fill any missing field)"""
+    try:
+        question_id, question_text, options_map, correct, selected, test_name = _get_detail_fields(record)
+    except KeyError:
+        return {
+            "question_id": record.get("question_id"),
+            "question_text": record.get("question_text", ""),
+            "options_map": record.get("options_map", {}),
+            "correct_option": record.get("correct_option", ""),
+            "student_selected_option": record.get("student_selected_option", ""),
+            "test_name": record.get("test_name", "Unknown")
+        }
+    return {
+        "question_id": question_id,
+        "question_text": question_text,
+        "options_map": options_map,
+        "correct_option": correct,
+        "student_selected_option": selected,
+        "test_name": test_name
+    }
+
+
 def group_by_topic(student_records: List[Dict]) -> Dict[str, Dict]:
     """
     Groups student records by topic and filters wrong questions
@@ -70,51 +105,40 @@ def group_by_topic(student_records: List[Dict]) -> Dict[str, Dict]:
     Returns:
         Dict[topic_name, {metadata, wrong_questions}]
     """
-    # First group all questions by topic
-    topic_all_questions = defaultdict(list)
-    topic_info = {}  # Store chapter and subject
+    # Single pass: per topic keep chapter/subject (first record wins), the
+    # question count and the wrong-question details, in first-seen order
+    topic_state = {}
     
     for record in student_records:
         topic = record.get("topic", "Unknown")
-        topic_all_questions[topic].append(record)
         
-        # Store topic metadata (chapter, subject)
-        if topic not in topic_info:
-            topic_info[topic] = {
+        state = topic_state.get(topic)
+        if state is None:
+            state = topic_state[topic] = {
                 "chapter": record.get("chapter", "Unknown"),
-                "subject": record.get("subject", "Unknown")
+                "subject": record.get("subject", "Unknown"),
+                "total": 0,
+                "wrong_questions": []
             }
+        state["total"] += 1
+        
+        if is_wrong_question(record):
+            state["wrong_questions"].append(_wrong_question_detail(record))
     
-    # Now filter only wrong questions and calculate metrics
+    # Finalize metrics, skipping topics with no wrong questions
     topic_groups = {}
     
-    for topic, all_questions in topic_all_questions.items():
-        # Filter wrong questions
-        wrong_questions = [q for q in all_questions if is_wrong_question(q)]
-        
-        # Skip topics with no wrong questions
-        if not wrong_questions:
+    for topic, state in topic_state.items():
+        wrong_question_details = state["wrong_questions"]
+        if not wrong_question_details:
             continue
         
-        # Calculate metrics
-        metrics = calculate_topic_metrics(all_questions, wrong_questions)
-        
-        # Build wrong question details
-        wrong_question_details = []
-        for q in wrong_questions:
-            wrong_question_details.append({
-                "question_id": q.get("question_id"),
-                "question_text": q.get("question_text", ""),
-                "options_map": q.get("options_map", {}),
-                "correct_option": q.get("correct_option", ""),
-                "student_selected_option": q.get("student_selected_option", ""),
-                "test_name": q.get("test_name", "Unknown")
-            })
+        metrics = calculate_topic_metrics(state["total"], len(wrong_question_details))
         
         topic_groups[topic] = {
             "topic_name": topic,
-            "chapter": topic_info[topic]["chapter"],
-            "subject": topic_info[topic]["subject"],
+            "chapter": state["chapter"],
+            "subject": state["subject"],
             "accuracy": metrics["accuracy"],
             "weighted_accuracy": metrics["weighted_accuracy"],
             "total_questions": metrics["total_questions"],
@@ -126,6 +150,17 @@ def group_by_topic(student_records: List[Dict]) -> Dict[str, Dict]:
     return topic_groups
 
 
+@lru_cache(maxsize=None)
+def _phase4_students_prefix(output_dir: str) -> str:
+    """output/phase4/students/ with a trailing separator, joined once per output dir"""
+    return os.path.join(output_dir, "phase4", "students") + os.sep
+
+
+def phase4_student_path(student_id: str) -> str:
+    """Path of a student's phase4 JSON file"""
+    return _phase4_students_prefix(Config.OUTPUT_DIR) + student_id + ".json"
+
+
 def load_student_data(student_id: str) -> List[Dict]:
     """
     Loads student data from phase4 output
@@ -136,15 +171,14 @@ def load_student_data(student_id: str) -> List[Dict]:
     Returns:
         List of all records for this student
     """
-    student_path = os.path.join(Config.OUTPUT_DIR, "phase4", "students", f"{student_id}.json")
+    student_path = phase4_student_path(student_id)
     
     if not os.path.exists(student_path):
         logger.warning(f"Student file not found: {student_id}.json")
         return []
     
     try:
-        with open(student_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = load_json_file(student_path)
         
         records = data.get("records", [])
         logger.info(f"Loaded {len(records)} records for student {student_id}")
@@ -154,6 +188,34 @@ def load_student_data(student_id: str) -> List[Dict]:
         return []
 
 
+def _process_one_student(filename: str):
+    """
+    Loads one student's records and groups their weak topics
+    Module-level so it can run in a worker process.
+    
+    Returns:
+        (student_id, topic_groups), or None when the student is skipped
+    """
+    student_id = filename.replace('.json', '')
+    
+    # Load student records
+    records = load_student_data(student_id)
+    
+    if not records:
+        logger.warning(f"No records for student {student_id}, skipping")
+        return None
+    
+    # Group by topic and filter wrong questions
+    topic_groups = group_by_topic(records)
+    
+    if not topic_groups:
+        logger.info(f"Student {student_id} has no weak topics (all correct!)")
+        return None
+    
+    logger.info(f"Student {student_id}: {len(topic_groups)} weak topics identified")
+    return student_id, topic_groups
+
+
 def process_all_students() -> Dict[str, Dict]:
     """
     Process all students from phase4 output
@@ -167,8 +229,7 @@ def process_all_students() -> Dict[str, Dict]:
         logger.error(f"Phase4 students directory not found: {students_dir}")
         return {}
     
-    student_files = [f for f in os.listdir(students_dir) 
-                     if f.endswith('.json') and f != '_index.json']
+    student_files = list_student_files(students_dir)
     
     if not student_files:
         logger.warning(f"No student files found in {students_dir}")
@@ -176,27 +237,14 @@ def process_all_students() -> Dict[str, Dict]:
     
     logger.info(f"Found {len(student_files)} student files")
     
+    # group_by_topic is CPU-bound Python, so spread students across processes
+    # (threads would serialize on the GIL); map() preserves the (inode-sorted) input order
     all_student_data = {}
-    
-    for filename in student_files:
-        student_id = filename.replace('.json', '')
-        
-        # Load student records
-        records = load_student_data(student_id)
-        
-        if not records:
-            logger.warning(f"No records for student {student_id}, skipping")
-            continue
-        
-        # Group by topic and filter wrong questions
-        topic_groups = group_by_topic(records)
-        
-        if not topic_groups:
-            logger.info(f"Student {student_id} has no weak topics (all correct!)")
-            continue
-        
-        all_student_data[student_id] = topic_groups
-        logger.info(f"Student {student_id}: {len(topic_groups)} weak topics identified")
+    chunksize = max(1, len(student_files) // (max(1, Config.CPU_WORKERS) * 4))
+    for processed in get_cpu_pool().map(_process_one_student, student_files, chunksize=chunksize):
+        if processed:
+            student_id, topic_groups = processed
+            all_student_data[student_id] = topic_groups
     
     logger.info(f"Processed {len(all_student_data)} students with weak topics")
     return all_student_data
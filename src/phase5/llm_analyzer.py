@@ -4,27 +4,84 @@ Generates unified pattern insights (problem + action + citation pairs)
 One LLM call per student
 """
 import json
-import time
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any, Tuple
+from src.config import Config
 from src.utils.llm_helper import setup_gemini, call_gemini_json
 from src.utils.logger import setup_logger
-from src.prompts import PHASE_5_UNIFIED_INSIGHTS_PROMPT
+from src.utils.llm_cache import content_key, cache_get, cache_put
+from src.utils.json_helper import json_dumps
+from src.prompts import PHASE_5_UNIFIED_INSIGHTS_PROMPT, PHASE_5_UNIFIED_INSIGHTS_BATCH_PROMPT
+
+try:
+    import fastjsonschema
+except ImportError:  # fastjsonschema is optional; validation then runs item by item
+    fastjsonschema = None
 
 logger = setup_logger(__name__)
 
+# Prompts whose replies are cached; each entry is keyed by the one that produced it
+_INSIGHTS_PROMPTS = (PHASE_5_UNIFIED_INSIGHTS_PROMPT, PHASE_5_UNIFIED_INSIGHTS_BATCH_PROMPT)
+
+_INSIGHT_TEXT_FIELDS = ("topic", "subject", "problem", "action", "citation")
+
+# A well-formed response (exactly 5 complete items, correctly typed) is accepted
+# by one compiled check; anything else goes through the repairing loop
+_WELL_FORMED_INSIGHTS = fastjsonschema.compile({
+    "type": "array",
+    "minItems": 5,
+    "maxItems": 5,
+    "items": {
+        "type": "object",
+        "required": list(_INSIGHT_TEXT_FIELDS) + ["accuracy"],
+        "properties": {
+            **{field: {"type": "string"} for field in _INSIGHT_TEXT_FIELDS},
+            "accuracy": {"type": "number"},
+        },
+    },
+}) if fastjsonschema else None
+
+
+def _to_accuracy(value: Any) -> float:
+    """Accuracy as float; anything that is not a number (or numeric string) becomes 0.0"""
+    # LLM output is nearly always already a float
+    if type(value) is float:
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError, OverflowError):
+        return 0.0
 
-def validate_insights(response: Any, student_id: str) -> List[Dict]:
+
+def validate_insights(response: Any, student_id: str) -> Tuple[List[Dict], bool]:
     """
     Validates unified insights response (expects exactly 5 items)
     
     Each item must have: topic, subject, accuracy, problem, action, citation
+    
+    Returns:
+        (insights, complete): complete is False when items had to be dropped,
+        padded or truncated, i.e. the response is not worth caching
     """
     if isinstance(response, dict) and "insights" in response:
         response = response["insights"]
     
     if not isinstance(response, list):
         logger.error(f"Student {student_id}: Expected list for insights, got {type(response)}")
-        return []
+        return [], False
+    
+    if _WELL_FORMED_INSIGHTS is not None:
+        try:
+            _WELL_FORMED_INSIGHTS(response)
+        except fastjsonschema.JsonSchemaException:
+            pass
+        else:
+            # Only the normalization is left (same result as the loop below)
+            for item in response:
+                for field in _INSIGHT_TEXT_FIELDS:
+                    item[field] = item[field].strip()
+                item["accuracy"] = float(item["accuracy"])
+            return response, True
     
     required_fields = ["topic", "subject", "accuracy", "problem", "action", "citation"]
     validated = []
@@ -46,13 +103,13 @@ def validate_insights(response: Any, student_id: str) -> List[Dict]:
         item["action"] = str(item.get("action", "")).strip()
         item["citation"] = str(item.get("citation", "")).strip()
         
-        try:
-            item["accuracy"] = float(item.get("accuracy", 0))
-        except:
-            item["accuracy"] = 0.0
+        item["accuracy"] = _to_accuracy(item.get("accuracy", 0))
         
         validated.append(item)
     
+    # Complete only if no item was dropped above and none is padded/truncated below
+    complete = len(validated) == len(response) == 5
+    
     # Ensure exactly 5 items
     if len(validated) < 5:
         logger.warning(f"Student {student_id}: Only {len(validated)} insights, padding to 5")
@@ -69,7 +126,29 @@ def validate_insights(response: Any, student_id: str) -> List[Dict]:
         logger.warning(f"Student {student_id}: {len(validated)} insights, truncating to 5")
         validated = validated[:5]
     
-    return validated
+    return validated, complete
+
+
+def _insights_cache_key(topic_data: Dict, prompt: str) -> str:
+    """Cache key of a student's insights: the prompt that produced them plus the student's content"""
+    return content_key(prompt, _student_content(topic_data))
+
+
+def _cached_insights(topic_data: Dict) -> List[Dict] | None:
+    """
+    Returns cached insights for identical topic data, or None
+    Entries produced by either current prompt (single or batch) are valid.
+    """
+    for prompt in _INSIGHTS_PROMPTS:
+        cached = cache_get("phase5", _insights_cache_key(topic_data, prompt))
+        if cached is not None:
+            return cached
+    return None
+
+
+def _student_content(topic_data: Dict) -> str:
+    """LLM content for one student's topic data"""
+    return json.dumps(topic_data, indent=2, ensure_ascii=False)
 
 
 def generate_insights(student_id: str, topic_data: Dict) -> List[Dict]:
@@ -87,13 +166,20 @@ def generate_insights(student_id: str, topic_data: Dict) -> List[Dict]:
     
     try:
         # Prepare content
-        content = json.dumps(topic_data, indent=2, ensure_ascii=False)
+        content = _student_content(topic_data)
+        
+        # Identical prompt + content (reruns, students with the same weak topics)
+        # reuse the stored insights instead of calling the LLM again
+        cached = _cached_insights(topic_data)
+        if cached is not None:
+            logger.info(f"Student {student_id}: using cached pattern insights")
+            return cached
         
         # Call LLM (single call)
         response = call_gemini_json(PHASE_5_UNIFIED_INSIGHTS_PROMPT, content)
         
         # Validate
-        validated = validate_insights(response, student_id)
+        validated, complete = validate_insights(response, student_id)
         
         if len(validated) != 5:
             logger.error(f"Student {student_id}: Failed to get exactly 5 insights")
@@ -110,6 +196,10 @@ def generate_insights(student_id: str, topic_data: Dict) -> List[Dict]:
                 })
             return fallback
         
+        # Repaired (padded/truncated) answers are used for this run only, so a
+        # rerun asks the LLM again instead of serving the placeholders forever
+        if complete:
+            cache_put("phase5", _insights_cache_key(topic_data, PHASE_5_UNIFIED_INSIGHTS_PROMPT), validated)
         logger.info(f"Successfully generated 5 pattern insights for student {student_id}")
         return validated
         
@@ -129,6 +219,65 @@ def generate_insights(student_id: str, topic_data: Dict) -> List[Dict]:
         return fallback
 
 
+def generate_insights_batch(batch: Dict[str, Dict]) -> Dict[str, List[Dict]]:
+    """
+    Generates insights for several students in a single LLM call
+    Cached students are skipped; students the batched response does not
+    cover are re-sent individually.
+    
+    Args:
+        batch: Dict[student_id, topic_data]
+    
+    Returns:
+        Dict[student_id, list_of_5_insights] in input order
+    """
+    results = {}
+    
+    # Students analyzed before with identical data are served from the cache
+    misses = {}
+    for student_id, topic_data in batch.items():
+        cached = _cached_insights(topic_data)
+        if cached is not None:
+            logger.info(f"Student {student_id}: using cached pattern insights")
+            results[student_id] = cached
+        else:
+            misses[student_id] = topic_data
+    
+    if len(misses) <= 1:
+        for student_id, topic_data in misses.items():
+            results[student_id] = generate_insights(student_id, topic_data)
+        return {student_id: results[student_id] for student_id in batch}
+    
+    logger.info(f"Generating pattern insights for {len(misses)} students in one call")
+    
+    try:
+        content = json_dumps({"students": misses}).decode("utf-8")
+        response = call_gemini_json(PHASE_5_UNIFIED_INSIGHTS_BATCH_PROMPT, content)
+    except Exception as e:
+        logger.error(f"Batched insights call failed: {e}. Retrying per student")
+        response = None
+    
+    # Expected: {student_id: [5 insights]}, possibly wrapped under "students"
+    if isinstance(response, dict) and isinstance(response.get("students"), dict):
+        response = response["students"]
+    if not isinstance(response, dict):
+        response = {}
+    
+    for student_id, topic_data in misses.items():
+        part = response.get(student_id)
+        validated, complete = (validate_insights(part, student_id) if isinstance(part, list) and part
+                               else ([], False))
+        if len(validated) == 5:
+            if complete:
+                cache_put("phase5", _insights_cache_key(topic_data, PHASE_5_UNIFIED_INSIGHTS_BATCH_PROMPT),
+                          validated)
+            results[student_id] = validated
+        else:
+            results[student_id] = generate_insights(student_id, topic_data)
+    
+    return {student_id: results[student_id] for student_id in batch}
+
+
 def process(student_data: Dict[str, Dict]) -> Dict[str, List[Dict]]:
     """
     Process all students to generate unified pattern insights
@@ -144,20 +293,30 @@ def process(student_data: Dict[str, Dict]) -> Dict[str, List[Dict]]:
     total_students = len(student_data)
     logger.info(f"Starting Phase 5 LLM analysis for {total_students} students")
     
-    all_insights = {}
-    
-    for idx, (student_id, topic_data) in enumerate(student_data.items(), 1):
-        logger.info(f"[{idx}/{total_students}] Processing student {student_id}")
-        
-        # Generate insights (single LLM call)
-        insights = generate_insights(student_id, topic_data)
-        
-        all_insights[student_id] = insights
+    # One LLM call per batch of Config.PHASE5_BATCH_SIZE students (default: per
+    # student), overlapped up to Config.LLM_CONCURRENCY; request starts are paced
+    # to Config.LLM_REQUESTS_PER_MINUTE (default 60/min, the old per-call sleep's
+    # ceiling) and 429/5xx backoff is handled in llm_helper
+    results = {}
+    if total_students:
+        batch_size = max(1, Config.PHASE5_BATCH_SIZE)
+        student_ids = list(student_data)
+        batches = [
+            {student_id: student_data[student_id] for student_id in student_ids[i:i + batch_size]}
+            for i in range(0, total_students, batch_size)
+        ]
         
-        # Rate limiting
-        time.sleep(1)
-        
-        logger.info(f"Completed student {student_id}: 5 insight pairs")
+        max_workers = max(1, min(len(batches), Config.LLM_CONCURRENCY))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(generate_insights_batch, batch) for batch in batches]
+            
+            for future in as_completed(futures):
+                for student_id, insights in future.result().items():
+                    results[student_id] = insights
+                    logger.info(f"[{len(results)}/{total_students}] Completed student {student_id}: 5 insight pairs")
+    
+    # Keep input order for downstream writers
+    all_insights = {student_id: results[student_id] for student_id in student_data}
     
     logger.info(f"Phase 5 LLM analysis complete for all {total_students} students")
     
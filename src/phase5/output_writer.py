@@ -1,48 +1,37 @@
 """
 Phase 5 Output Writer
-Writes unified pattern insights to student files and summary CSV
+Writes unified pattern insights to the summary JSON and per-student sidecar files
 """
-import json
 import os
 import csv
 from typing import Dict, List
 from src.config import Config
 from src.utils.logger import setup_logger
+from src.utils.json_helper import dump_json_file
+from src.utils.pools import get_io_pool
 
 logger = setup_logger(__name__)
 
 
-def write_student_insights(student_id: str, insights: List[Dict]):
+def write_student_sidecars(by_student: Dict[str, List[Dict]], sidecar_dir: str):
     """
-    Writes Phase 5 insights to student's JSON file in phase4
-    Adds 'phase5_insights' field without overwriting existing data
-    
-    Args:
-        student_id: Student identifier
-        insights: List of 5 insight pairs (problem + action + citation)
+    Writes each student's rows of the insights summary to <sidecar_dir>/<student_id>.json
+    Lets a single-student report read its own insights without parsing the whole
+    summary. Sidecars from earlier runs are removed first so none go stale.
     """
-    student_path = os.path.join(Config.OUTPUT_DIR, "phase4", "students", f"{student_id}.json")
+    os.makedirs(sidecar_dir, exist_ok=True)
+    with os.scandir(sidecar_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith('.json') and entry.is_file():
+                os.remove(entry.path)
     
-    if not os.path.exists(student_path):
-        logger.warning(f"Student file not found for {student_id}, skipping")
-        return
+    sidecar_prefix = sidecar_dir + os.sep
     
-    try:
-        # Load existing data
-        with open(student_path, 'r', encoding='utf-8') as f:
-            student_data = json.load(f)
-        
-        # Add phase5 insights
-        student_data["phase5_insights"] = insights
-        
-        # Write back
-        with open(student_path, 'w', encoding='utf-8') as f:
-            json.dump(student_data, f, indent=2, ensure_ascii=False)
-        
-        logger.info(f"Wrote Phase 5 insights for student {student_id}")
-        
-    except Exception as e:
-        logger.error(f"Failed to write insights for student {student_id}: {e}")
+    def write_one(student_id, rows):
+        dump_json_file(rows, sidecar_prefix + student_id + ".json")
+    
+    # list() surfaces any write error
+    list(get_io_pool().map(write_one, by_student.keys(), by_student.values()))
 
 
 def write_insights_json(all_insights: Dict[str, List[Dict]]):
@@ -59,10 +48,12 @@ def write_insights_json(all_insights: Dict[str, List[Dict]]):
     
     # Build structured output
     output_data = []
+    by_student = {}
     
     for student_id, insights in all_insights.items():
+        rows = by_student[student_id] = []
         for rank, insight in enumerate(insights, 1):
-            output_data.append({
+            rows.append({
                 "student_id": student_id,
                 "insight_rank": rank,
                 "topic": insight.get("topic", ""),
@@ -72,10 +63,11 @@ def write_insights_json(all_insights: Dict[str, List[Dict]]):
                 "action": insight.get("action", ""),
                 "citation": insight.get("citation", "")
             })
+        output_data.extend(rows)
     
     if output_data:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(output_data, f, indent=2, ensure_ascii=False)
+        dump_json_file(output_data, output_path, pretty=True)
+        write_student_sidecars(by_student, os.path.join(output_dir, "student_pattern_insights_by_student"))
         
         logger.info(f"Wrote insights JSON: {output_path} with {len(output_data)} insights")
     else:
@@ -91,11 +83,8 @@ def process(all_insights: Dict[str, List[Dict]]):
     """
     logger.info(f"Writing Phase 5 outputs for {len(all_insights)} students")
     
-    # Write individual student files
-    for student_id, insights in all_insights.items():
-        write_student_insights(student_id, insights)
-    
-    # Write summary JSON
+    # Write summary JSON and per-student sidecars (phase4 student files are
+    # left untouched; phase6 reads insights from these)
     write_insights_json(all_insights)
     
     logger.info(f"Phase 5 output writing complete")
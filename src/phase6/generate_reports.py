@@ -2,24 +2,26 @@
 Phase 6: PDF Report Generator
 Combines phase4 (test scores) and phase5 (insights) into per-student PDFs
 """
-import json
 import os
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
+from functools import lru_cache
+from concurrent.futures import as_completed
 from datetime import datetime
 from io import BytesIO
-import plotly.express as px
-import plotly.graph_objects as go
-import re
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle
-from svglib.svglib import svg2rlg
+from reportlab.graphics.shapes import Drawing, Group, String
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
 from src.utils.logger import setup_logger
+from src.utils.json_helper import load_json_file
+from src.utils.pools import get_cpu_pool
 from dotenv import load_dotenv
 
 logger = setup_logger(__name__)
@@ -28,10 +30,87 @@ logger = setup_logger(__name__)
 BASE_DIR = Path(__file__).parent.parent.parent
 PHASE4_DIR = BASE_DIR / "output" / "phase4" / "students"
 PHASE5_FILE = BASE_DIR / "output" / "phase5" / "student_pattern_insights.json"
+PHASE5_BY_STUDENT_DIR = BASE_DIR / "output" / "phase5" / "student_pattern_insights_by_student"
 OUTPUT_DIR = BASE_DIR / "output" / "phase6" / "reports"
-CHARTS_DIR = BASE_DIR / "output" / "phase6" / "charts"
 TEMPLATE_DIR = Path(__file__).parent
 
+# Chart geometry (points; width matches the page's 6.5 inch content width)
+CHART_WIDTH = 6.5 * inch
+CHART_HEIGHT = 3.7 * inch
+CHART_COLORS = {
+    "correct": colors.HexColor('#2ecc71'),
+    "incorrect": colors.HexColor('#e74c3c'),
+    "unattempted": colors.HexColor('#95a5a6'),
+}
+
+# Report styles: built once at import and shared by every student's PDF
+_STYLES = getSampleStyleSheet()
+
+TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=_STYLES['Heading1'],
+    fontSize=24,
+    textColor=colors.HexColor('#2c3e50'),
+    spaceAfter=30,
+    alignment=TA_CENTER
+)
+
+HEADING_STYLE = ParagraphStyle(
+    'CustomHeading',
+    parent=_STYLES['Heading2'],
+    fontSize=16,
+    textColor=colors.HexColor('#2c3e50'),
+    spaceAfter=12,
+    spaceBefore=20,
+    leftIndent=0
+)
+
+INSIGHT_HEADING_STYLE = ParagraphStyle(
+    'InsightHeading',
+    parent=_STYLES['Heading3'],
+    fontName='Helvetica-Bold',
+    fontSize=14,
+    leading=18,
+    textColor=colors.HexColor('#2c3e50'),
+    spaceAfter=10,
+    spaceBefore=8
+)
+
+BODY_STYLE = ParagraphStyle(
+    'CustomBody',
+    parent=_STYLES['BodyText'],
+    fontName='Helvetica',
+    fontSize=11,
+    leading=14,
+    textColor=colors.HexColor('#333333'),
+    spaceAfter=8,
+    alignment=TA_LEFT
+)
+
+LABEL_STYLE = ParagraphStyle(
+    'Label',
+    parent=_STYLES['BodyText'],
+    fontName='Helvetica-Bold',
+    fontSize=10,
+    leading=12,
+    textColor=colors.HexColor('#34495e'),
+    spaceAfter=6,
+    leftIndent=0
+)
+
+SUBJECT_TABLE_HEADER = ['Subject', 'Correct', 'Incorrect', 'Unattempted', 'Total', 'Score']
+SUBJECT_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f9f9f9')),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+])
+
 
 def calculate_score(correct: int, incorrect: int, unattempted: int) -> float:
     """
@@ -68,38 +147,64 @@ def load_student_data(student_id: str) -> Optional[Dict]:
         return None
     
     try:
-        with open(student_file, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return load_json_file(student_file)
     except Exception as e:
         logger.error(f"Error loading student {student_id}: {e}")
         return None
 
 
-def load_phase5_insights() -> Dict[str, List[Dict]]:
+@lru_cache(maxsize=1)
+def _load_grouped_insights(mtime_ns: int) -> Dict[str, List[Dict]]:
+    """
+    Parses the phase5 summary and groups it by student
+    Keyed on the file's mtime so repeated process() calls reuse the parse
+    until phase5 rewrites the file.
+    """
+    insights_list = load_json_file(PHASE5_FILE)
+    
+    # Group by student_id
+    insights_by_student = defaultdict(list)
+    for insight in insights_list:
+        student_id = insight.get("student_id")
+        if student_id:
+            insights_by_student[student_id].append(insight)
+    
+    return dict(insights_by_student)
+
+
+def load_phase5_insights(student_id: Optional[str] = None) -> Dict[str, List[Dict]]:
     """
     Load phase5 insights JSON
     Returns dict: {student_id: [list of 5 insights]}
+    
+    With student_id, only that student's insights are returned, read from
+    their per-student sidecar when phase5 wrote one.
     """
+    if student_id:
+        sidecar = PHASE5_BY_STUDENT_DIR / f"{student_id}.json"
+        if sidecar.exists():
+            try:
+                return {student_id: load_json_file(sidecar)}
+            except Exception as e:
+                logger.warning(f"Error loading phase5 insights sidecar {sidecar}: {e}")
+    
     if not PHASE5_FILE.exists():
         logger.warning(f"Phase 5 insights not found: {PHASE5_FILE}")
         return {}
     
     try:
-        with open(PHASE5_FILE, "r", encoding="utf-8") as f:
-            insights_list = json.load(f)
-        
-        # Group by student_id
-        insights_by_student = defaultdict(list)
-        for insight in insights_list:
-            student_id = insight.get("student_id")
-            if student_id:
-                insights_by_student[student_id].append(insight)
-        
-        return dict(insights_by_student)
-    
+        insights_by_student = _load_grouped_insights(PHASE5_FILE.stat().st_mtime_ns)
     except Exception as e:
         logger.error(f"Error loading phase5 insights: {e}")
         return {}
+    
+    if student_id:
+        return {student_id: insights_by_student[student_id]} if student_id in insights_by_student else {}
+    return insights_by_student
+
+
+# Counter slot for each classify_answer() result
+_CLASSIFICATION_SLOT = {"correct": 0, "incorrect": 1, "unattempted": 2}
 
 
 def aggregate_test_subject_scores(records: List[Dict]) -> Dict[str, Dict[str, Dict]]:
@@ -115,121 +220,114 @@ def aggregate_test_subject_scores(records: List[Dict]) -> Dict[str, Dict[str, Di
             "class_8": {...}
         }
     """
-    aggregated = defaultdict(lambda: defaultdict(lambda: {"correct": 0, "incorrect": 0, "unattempted": 0}))
+    # One flat [correct, incorrect, unattempted] counter per (test, subject),
+    # kept in first-seen order
+    counts = {}
     
     for record in records:
-        test_name = record.get("test_name", "Unknown")
-        subject = record.get("subject", "Unknown")
-        correct_option = record.get("correct_option", "")
-        student_selected = record.get("student_selected_option", "")
+        key = (record.get("test_name", "Unknown"), record.get("subject", "Unknown"))
         
         # Classify the answer
-        classification = classify_answer(correct_option, student_selected)
+        classification = classify_answer(record.get("correct_option", ""),
+                                         record.get("student_selected_option", ""))
         
         # Increment count
-        aggregated[test_name][subject][classification] += 1
+        bucket = counts.get(key)
+        if bucket is None:
+            bucket = counts[key] = [0, 0, 0]
+        bucket[_CLASSIFICATION_SLOT[classification]] += 1
     
     # Calculate scores
     result = {}
-    for test_name, subjects in aggregated.items():
-        result[test_name] = {}
-        for subject, counts in subjects.items():
-            correct = counts["correct"]
-            incorrect = counts["incorrect"]
-            unattempted = counts["unattempted"]
-            score = calculate_score(correct, incorrect, unattempted)
-            
-            result[test_name][subject] = {
-                "correct": correct,
-                "incorrect": incorrect,
-                "unattempted": unattempted,
-                "score": score,
-                "total": correct + incorrect + unattempted
-            }
+    for (test_name, subject), (correct, incorrect, unattempted) in counts.items():
+        result.setdefault(test_name, {})[subject] = {
+            "correct": correct,
+            "incorrect": incorrect,
+            "unattempted": unattempted,
+            "score": calculate_score(correct, incorrect, unattempted),
+            "total": correct + incorrect + unattempted
+        }
     
     return result
 
 
-def create_test_chart(test_name: str, subject_scores: Dict[str, Dict], student_id: str) -> str:
+@lru_cache(maxsize=1024)
+def display_test_name(test_name: str) -> str:
+    """Human-readable test title ("class_7" -> "Class 7"); the same few names recur for every student"""
+    if not test_name or str(test_name).strip() == "":
+        return "Unnamed Test"
+    return str(test_name).replace('_', ' ').title()
+
+
+def create_test_chart(test_name: str, subject_scores: Dict[str, Dict]) -> Drawing:
     """
     Create a bar chart for a single test showing subject-wise scores
+    Built as a native ReportLab drawing, so it embeds in the PDF as vector
+    graphics without an image export step.
     
     Returns:
-        Path to saved chart PNG
+        Drawing sized to the report's content width
     """
     subjects = list(subject_scores.keys())
     scores = [subject_scores[subj]["score"] for subj in subjects]
     correct = [subject_scores[subj]["correct"] for subj in subjects]
     incorrect = [subject_scores[subj]["incorrect"] for subj in subjects]
-    unattempted = [subject_scores[subj]["unattempted"] for subj in subjects]
     
-    # Normalize test title for display and filename
-    if not test_name or str(test_name).strip() == "":
-        test_title = "Unnamed Test"
-    else:
-        test_title = str(test_name).replace('_', ' ').title()
-    # Safe filename: keep alnum, dash, underscore
-    safe_test_name = re.sub(r'[^A-Za-z0-9_-]', '_', str(test_name).strip().replace(' ', '_'))
-
-    # Create stacked bar chart with modern styling (no data labels)
-    fig = go.Figure()
-
-    # Correct: show positive score contribution
-    fig.add_trace(go.Bar(
-        name='Correct (+4)',
-        x=subjects,
-        y=[c * 4 for c in correct],
-        marker_color='#2ecc71'
-    ))
-
-    # Incorrect: negative contribution
-    fig.add_trace(go.Bar(
-        name='Incorrect (-1)',
-        x=subjects,
-        y=[i * -1 for i in incorrect],
-        marker_color='#e74c3c'
-    ))
-
-    # Unattempted: zero contribution, show counts instead of score
-    fig.add_trace(go.Bar(
-        name='Unattempted',
-        x=subjects,
-        y=[0 for _ in unattempted],
-        marker_color='#95a5a6'
-    ))
-
-    # Global styling for crisp PDF rendering
-    fig.update_layout(
-        title=f"Test: {test_title} - Subject-wise Performance",
-        xaxis_title="Subject",
-        yaxis_title="Score Contribution",
-        barmode='relative',
-        height=400,
-        template="plotly_white",
-        font=dict(size=14, family='Arial'),
-        plot_bgcolor='white',
-        paper_bgcolor='white',
-        margin=dict(l=40, r=40, t=60, b=40),
-        showlegend=True
-    )
-
-    # Add net score annotation
-    total_score = sum(scores)
-    fig.add_annotation(
-        text=f"Total Score: {total_score}",
-        xref="paper", yref="paper",
-        x=0.5, y=1.08,
-        showarrow=False,
-        font=dict(size=12, color="black")
-    )
-
-    # Save chart as SVG (vector)
-    CHARTS_DIR.mkdir(parents=True, exist_ok=True)
-    chart_path = CHARTS_DIR / f"{student_id}_{safe_test_name}.svg"
-    fig.write_image(str(chart_path), engine="kaleido")
-
-    logger.debug(f"Created chart: {chart_path}")
-    return str(chart_path)
+    test_title = display_test_name(test_name)
+    
+    drawing = Drawing(CHART_WIDTH, CHART_HEIGHT)
+    
+    # Stacked bars: correct (+4 each) above the axis, incorrect (-1 each) below;
+    # unattempted contributes nothing and only appears in the legend
+    positive = [c * 4 for c in correct]
+    negative = [i * -1 for i in incorrect]
+    
+    chart = VerticalBarChart()
+    chart.x, chart.y = 50, 45
+    chart.width = CHART_WIDTH - 190
+    chart.height = CHART_HEIGHT - 105
+    chart.data = [positive, negative]
+    chart.categoryAxis.categoryNames = subjects
+    chart.categoryAxis.style = 'stacked'
+    chart.categoryAxis.labelAxisMode = 'low'
+    chart.categoryAxis.labels.fontName = 'Helvetica'
+    chart.categoryAxis.labels.fontSize = 9
+    chart.valueAxis.valueMin = min(negative + [0])
+    chart.valueAxis.valueMax = max(positive + [1])
+    chart.valueAxis.labels.fontName = 'Helvetica'
+    chart.valueAxis.labels.fontSize = 9
+    chart.valueAxis.visibleGrid = True
+    chart.valueAxis.gridStrokeColor = colors.HexColor('#e5e5e5')
+    chart.bars.strokeColor = None
+    chart.bars[0].fillColor = CHART_COLORS["correct"]
+    chart.bars[1].fillColor = CHART_COLORS["incorrect"]
+    drawing.add(chart)
+    
+    legend = Legend()
+    legend.x, legend.y = CHART_WIDTH - 125, chart.y + chart.height
+    legend.fontName = 'Helvetica'
+    legend.fontSize = 9
+    legend.colorNamePairs = [
+        (CHART_COLORS["correct"], 'Correct (+4)'),
+        (CHART_COLORS["incorrect"], 'Incorrect (-1)'),
+        (CHART_COLORS["unattempted"], 'Unattempted'),
+    ]
+    drawing.add(legend)
+    
+    # Title, net score annotation and axis titles
+    drawing.add(String(CHART_WIDTH / 2, CHART_HEIGHT - 18,
+                       f"Test: {test_title} - Subject-wise Performance",
+                       fontName='Helvetica-Bold', fontSize=12, textAnchor='middle'))
+    drawing.add(String(CHART_WIDTH / 2, CHART_HEIGHT - 36, f"Total Score: {sum(scores)}",
+                       fontName='Helvetica', fontSize=10, textAnchor='middle'))
+    drawing.add(String(chart.x + chart.width / 2, 8, "Subject",
+                       fontName='Helvetica', fontSize=10, textAnchor='middle'))
+    axis_title = String(0, 0, "Score Contribution", fontName='Helvetica', fontSize=10, textAnchor='middle')
+    axis_group = Group(axis_title)
+    axis_group.transform = (0, 1, -1, 0, 14, chart.y + chart.height / 2)
+    drawing.add(axis_group)
+    
+    return drawing
 
 
 def generate_pdf_report(student_id: str, student_data: Dict, insights: List[Dict]) -> str:
@@ -253,103 +351,28 @@ def generate_pdf_report(student_id: str, student_data: Dict, insights: List[Dict
     
     # Container for elements
     story = []
-    styles = getSampleStyleSheet()
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=24,
-        textColor=colors.HexColor('#2c3e50'),
-        spaceAfter=30,
-        alignment=TA_CENTER
-    )
-    
-    heading_style = ParagraphStyle(
-        'CustomHeading',
-        parent=styles['Heading2'],
-        fontSize=16,
-        textColor=colors.HexColor('#2c3e50'),
-        spaceAfter=12,
-        spaceBefore=20,
-        leftIndent=0
-    )
-    
-    insight_heading_style = ParagraphStyle(
-        'InsightHeading',
-        parent=styles['Heading3'],
-        fontName='Helvetica-Bold',
-        fontSize=14,
-        leading=18,
-        textColor=colors.HexColor('#2c3e50'),
-        spaceAfter=10,
-        spaceBefore=8
-    )
-    
-    body_style = ParagraphStyle(
-        'CustomBody',
-        parent=styles['BodyText'],
-        fontName='Helvetica',
-        fontSize=11,
-        leading=14,
-        textColor=colors.HexColor('#333333'),
-        spaceAfter=8,
-        alignment=TA_LEFT
-    )
-    
-    label_style = ParagraphStyle(
-        'Label',
-        parent=styles['BodyText'],
-        fontName='Helvetica-Bold',
-        fontSize=10,
-        leading=12,
-        textColor=colors.HexColor('#34495e'),
-        spaceAfter=6,
-        leftIndent=0
-    )
     
     # Title
-    story.append(Paragraph("Student Performance Report", title_style))
-    story.append(Paragraph(f"<b>Student ID:</b> {student_id} | <b>Total Questions:</b> {student_data.get('total_records', 0)}", body_style))
+    story.append(Paragraph("Student Performance Report", TITLE_STYLE))
+    story.append(Paragraph(f"<b>Student ID:</b> {student_id} | <b>Total Questions:</b> {student_data.get('total_records', 0)}", BODY_STYLE))
     story.append(Spacer(1, 0.3*inch))
     
     # Test Performance Section
-    story.append(Paragraph("Test-wise Performance Analysis", heading_style))
+    story.append(Paragraph("Test-wise Performance Analysis", HEADING_STYLE))
     
     # Generate charts for each test
     for test_name, subject_scores in test_subject_scores.items():
-        chart_path = create_test_chart(test_name, subject_scores, student_id)
+        chart = create_test_chart(test_name, subject_scores)
         
         # Add test name (normalized for clarity)
-        if not test_name or str(test_name).strip() == "":
-            display_test = "Unnamed Test"
-        else:
-            display_test = str(test_name).replace('_', ' ').title()
-        story.append(Paragraph(f"<b>{display_test}</b>", insight_heading_style))
+        story.append(Paragraph(f"<b>{display_test_name(test_name)}</b>", INSIGHT_HEADING_STYLE))
         
-        # Add chart (SVG via svglib -> ReportLab drawing)
-        try:
-            drawing = svg2rlg(str(chart_path))
-            if getattr(drawing, 'width', None) and drawing.width > 0:
-                scale = (6.5 * inch) / drawing.width
-                drawing.scale(scale, scale)
-            story.append(drawing)
-            story.append(Spacer(1, 0.2*inch))
-        except Exception as e:
-            logger.warning(f"SVG embedding failed for {chart_path}: {e}")
-            try:
-                # Fallback: use PNG if available
-                png_path = str(chart_path).replace('.svg', '.png')
-                from reportlab.platypus import Image as RLImage
-                if os.path.exists(png_path):
-                    img = RLImage(png_path, width=6.5*inch, height=3.5*inch)
-                    story.append(img)
-                    story.append(Spacer(1, 0.2*inch))
-            except Exception:
-                pass
+        # Add chart (native ReportLab drawing)
+        story.append(chart)
+        story.append(Spacer(1, 0.2*inch))
         
         # Add subject details table
-        table_data = [['Subject', 'Correct', 'Incorrect', 'Unattempted', 'Total', 'Score']]
+        table_data = [SUBJECT_TABLE_HEADER]
         for subject, stats in sorted(subject_scores.items()):
             table_data.append([
                 subject,
@@ -361,23 +384,13 @@ def generate_pdf_report(student_id: str, student_data: Dict, insights: List[Dict
             ])
         
         table = Table(table_data, colWidths=[2*inch, 0.8*inch, 0.8*inch, 1*inch, 0.7*inch, 0.7*inch])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f9f9f9')),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-        ]))
+        table.setStyle(SUBJECT_TABLE_STYLE)
         story.append(table)
         story.append(Spacer(1, 0.3*inch))
     
     # Pattern Insights Section
     story.append(PageBreak())
-    story.append(Paragraph("Learning Pattern Insights", heading_style))
+    story.append(Paragraph("Learning Pattern Insights", HEADING_STYLE))
     story.append(Spacer(1, 0.2*inch))
     
     if insights:
@@ -396,35 +409,35 @@ def generate_pdf_report(student_id: str, student_data: Dict, insights: List[Dict
             # Insight header
             story.append(Paragraph(
                 f"<b>Priority #{rank}: {topic}</b> (Accuracy: {accuracy:.1f}%)",
-                insight_heading_style
+                INSIGHT_HEADING_STYLE
             ))
-            story.append(Paragraph(f"<i>Subject: {subject}</i>", label_style))
+            story.append(Paragraph(f"<i>Subject: {subject}</i>", LABEL_STYLE))
             story.append(Spacer(1, 0.1*inch))
             
             # Problem
-            story.append(Paragraph("<b>Problem Identified:</b>", label_style))
-            story.append(Paragraph(problem or "Not specified.", body_style))
+            story.append(Paragraph("<b>Problem Identified:</b>", LABEL_STYLE))
+            story.append(Paragraph(problem or "Not specified.", BODY_STYLE))
             story.append(Spacer(1, 0.1*inch))
             
             # Action
-            story.append(Paragraph("<b>Recommended Action:</b>", label_style))
-            story.append(Paragraph(action or "No action provided.", body_style))
+            story.append(Paragraph("<b>Recommended Action:</b>", LABEL_STYLE))
+            story.append(Paragraph(action or "No action provided.", BODY_STYLE))
             story.append(Spacer(1, 0.1*inch))
             
             # Citation
-            story.append(Paragraph("<b>Evidence:</b>", label_style))
-            story.append(Paragraph(f"<i>{(citation or 'No evidence provided.')}</i>", body_style))
+            story.append(Paragraph("<b>Evidence:</b>", LABEL_STYLE))
+            story.append(Paragraph(f"<i>{(citation or 'No evidence provided.')}</i>", BODY_STYLE))
             story.append(Spacer(1, 0.2*inch))
             
             # Separator
             story.append(Spacer(1, 0.1*inch))
     else:
-        story.append(Paragraph("No pattern insights available for this student yet.", body_style))
+        story.append(Paragraph("No pattern insights available for this student yet.", BODY_STYLE))
     
     # Footer
     story.append(Spacer(1, 0.5*inch))
     footer_text = f"Report generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} | © Pace Analytics"
-    story.append(Paragraph(footer_text, label_style))
+    story.append(Paragraph(footer_text, LABEL_STYLE))
     
     # Build PDF
     doc.build(story)
@@ -433,6 +446,38 @@ def generate_pdf_report(student_id: str, student_data: Dict, insights: List[Dict
     return str(pdf_path)
 
 
+def _generate_one(student_id: str, insights: List[Dict]) -> Optional[str]:
+    """
+    Loads one student's phase4 data and generates their PDF
+    Module-level so it can run in a worker process; only the student's own
+    insights are passed in.
+    
+    Returns:
+        Path to generated PDF, or None if the student was skipped or failed
+    """
+    try:
+        # Load student data
+        student_data = load_student_data(student_id)
+        if not student_data:
+            logger.warning(f"Skipping student {student_id}: no data")
+            return None
+        
+        # Older phase5 runs embedded the insights in the phase4 file instead
+        if not insights and student_data.get("phase5_insights"):
+            insights = [dict(insight, insight_rank=rank)
+                        for rank, insight in enumerate(student_data["phase5_insights"], 1)]
+        
+        # Insights may be empty
+        if not insights:
+            logger.warning(f"No insights found for student {student_id}, proceeding without insights")
+        
+        return generate_pdf_report(student_id, student_data, insights)
+        
+    except Exception as e:
+        logger.error(f"Failed to generate report for student {student_id}: {e}", exc_info=True)
+        return None
+
+
 def process(target_student_id: Optional[str] = None) -> int:
     """
     Main processing function for Phase 6
@@ -447,7 +492,6 @@ def process(target_student_id: Optional[str] = None) -> int:
     
     # Create output directories
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
-    CHARTS_DIR.mkdir(parents=True, exist_ok=True)
     
     # If target_student_id not provided, check env var PHASE6_STUDENT_ID
     if not target_student_id:
@@ -457,7 +501,7 @@ def process(target_student_id: Optional[str] = None) -> int:
             target_student_id = env_student
 
     # Load phase5 insights
-    all_insights = load_phase5_insights()
+    all_insights = load_phase5_insights(target_student_id)
     
     # Get list of students
     if target_student_id:
@@ -469,30 +513,22 @@ def process(target_student_id: Optional[str] = None) -> int:
         student_ids = [f.stem for f in student_files if f.stem != "_index"]
         logger.info(f"Generating reports for {len(student_ids)} students")
     
-    # Generate reports
+    # Generate reports: each PDF (chart rendering + layout) is CPU-bound and
+    # independent, so spread students across the shared process pool
     report_count = 0
-    for student_id in student_ids:
-        try:
-            # Load student data
-            student_data = load_student_data(student_id)
-            if not student_data:
-                logger.warning(f"Skipping student {student_id}: no data")
-                continue
-            
-            # Get insights (may be empty)
-            insights = all_insights.get(student_id, [])
-            if not insights:
-                logger.warning(f"No insights found for student {student_id}, proceeding without insights")
-            
-            # Generate PDF
-            pdf_path = generate_pdf_report(student_id, student_data, insights)
+    if len(student_ids) > 1:
+        pool = get_cpu_pool()
+        futures = [pool.submit(_generate_one, student_id, all_insights.get(student_id, []))
+                   for student_id in student_ids]
+        results = (future.result() for future in as_completed(futures))
+    else:
+        results = (_generate_one(student_id, all_insights.get(student_id, []))
+                   for student_id in student_ids)
+    
+    for pdf_path in results:
+        if pdf_path:
             report_count += 1
-            
             logger.info(f"[{report_count}/{len(student_ids)}] Report generated: {pdf_path}")
-            
-        except Exception as e:
-            logger.error(f"Failed to generate report for student {student_id}: {e}", exc_info=True)
-            continue
     
     logger.info(f"Phase 6 complete: {report_count} reports generated")
     return report_count
@@ -133,6 +133,15 @@ EXAMPLE
 Return the JSON array only when called.
 """
 
+PHASE_2_BATCH_ANALYSIS_PROMPT = PHASE_2_NEW_ANALYSIS_PROMPT + """
+BATCH MODE (overrides the one-subject-per-call rule above)
+The CONTENT is a JSON array of INPUT objects (one per subject) for the same student.
+Analyze each element independently, exactly as if it were sent in its own call.
+
+Return ONLY a JSON array of arrays: element i is the OUTPUT array for input element i,
+in the same order and with the same length as the input. No surrounding text.
+"""
+
 # =============================================================================
 # PHASE 3 PROMPTS
 # =============================================================================
@@ -504,3 +513,13 @@ EXAMPLE (valid vs invalid):
 - Strictly follow the format above
 - Each insight MUST have all 6 fields: topic, subject, accuracy, problem, action, citation
 """
+
+PHASE_5_UNIFIED_INSIGHTS_BATCH_PROMPT = PHASE_5_UNIFIED_INSIGHTS_PROMPT + """
+BATCH MODE (overrides the single-student output format above)
+The CONTENT is a JSON object {"students": {student_id: weak_topic_data, ...}} covering several students.
+Analyze each student independently, exactly as if their data were sent in its own call.
+Never use one student's questions, tests or metrics as evidence for another student.
+
+Return ONLY a JSON object mapping every input student_id to that student's JSON array of
+exactly 5 insight pairs, in the format above. No surrounding text.
+"""
@@ -0,0 +1,80 @@
+"""
+JSON read/write helpers
+Uses orjson when installed (several times faster to parse and dump),
+falling back to the stdlib json module otherwise.
+"""
+import json
+import os
+import re
+from typing import List
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # ijson is optional; arrays are then loaded whole
+    ijson = None
+
+# Student files: any *.json except the _index.json summary
+_STUDENT_FILE_RE = re.compile(r'(?!_index\.json$).*\.json$')
+
+
+def json_loads(raw):
+    """Parse JSON bytes/str with orjson when available"""
+    return orjson.loads(raw) if orjson else json.loads(raw)
+
+
+def json_dumps(obj, pretty: bool = False) -> bytes:
+    """
+    Serialize to UTF-8 JSON bytes with orjson when available
+    pretty=True indents by 2 spaces (the only indent orjson supports);
+    otherwise output is compact.
+    """
+    if orjson:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(obj, option=option)
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def load_json_file(path: str):
+    """Reads and parses a JSON file"""
+    with open(path, 'rb') as f:
+        return json_loads(f.read())
+
+
+def iter_json_array(path: str):
+    """
+    Yields the elements of a top-level JSON array file one at a time
+    With ijson available the file is streamed instead of loaded whole.
+    """
+    if ijson is None:
+        yield from load_json_file(path)
+        return
+    
+    with open(path, 'rb') as f:
+        # use_float keeps numbers as float instead of Decimal, matching json.load
+        yield from ijson.items(f, 'item', use_float=True)
+
+
+def dump_json_file(obj, path: str, pretty: bool = False):
+    """Serializes obj to a JSON file (UTF-8)"""
+    with open(path, 'wb') as f:
+        f.write(json_dumps(obj, pretty))
+
+
+def list_student_files(directory: str) -> List[str]:
+    """
+    Names of the per-student JSON files in directory (everything but _index.json)
+    Sorted by inode, so loading them in order keeps reads close to on-disk layout;
+    scandir's entries carry the file type from the listing (no per-file stat).
+    """
+    with os.scandir(directory) as entries:
+        return [e.name for e in sorted(
+            (e for e in entries
+             if _STUDENT_FILE_RE.match(e.name) and e.is_file()),
+            key=os.DirEntry.inode)]
@@ -0,0 +1,49 @@
+"""
+On-disk cache for LLM responses
+Entries are JSON files under Config.LLM_CACHE_DIR/<namespace>/<key>.json,
+keyed by a hash of everything that determines the response. Disabled
+entirely with LLM_CACHE=0.
+"""
+import hashlib
+import os
+import threading
+from typing import Any
+from src.config import Config
+from src.utils.logger import setup_logger
+from src.utils.json_helper import load_json_file, dump_json_file
+
+logger = setup_logger(__name__)
+
+
+def content_key(*parts: str) -> str:
+    """SHA-256 hex digest of the given strings (NUL-separated)"""
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+def _cache_path(namespace: str, key: str) -> str:
+    return os.path.join(Config.LLM_CACHE_DIR, namespace, f"{key}.json")
+
+
+def cache_get(namespace: str, key: str) -> Any:
+    """Returns the cached value for key, or None on a miss (or when caching is off)"""
+    if not Config.LLM_CACHE_ENABLED:
+        return None
+    try:
+        return load_json_file(_cache_path(namespace, key))
+    except (OSError, ValueError):
+        return None
+
+
+def cache_put(namespace: str, key: str, value: Any):
+    """Stores a JSON-serializable value; write failures are logged, never raised"""
+    if not Config.LLM_CACHE_ENABLED:
+        return
+    path = _cache_path(namespace, key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        dump_json_file(value, tmp_path)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not write LLM cache entry {path}: {e}")
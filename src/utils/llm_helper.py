@@ -3,6 +3,9 @@ import os
 import json
 import logging
 import re
+import threading
+import time
+from functools import lru_cache
 from src.config import Config
 
 logger = logging.getLogger(__name__)
@@ -11,6 +14,16 @@ def setup_gemini():
     if not Config.GEMINI_API_KEY:
         raise ValueError("GEMINI_API_KEY not found in environment variables.")
     genai.configure(api_key=Config.GEMINI_API_KEY)
+    # Pre-warm the shared model so the first concurrent calls don't all build it
+    get_model(Config.MODEL_NAME)
+
+@lru_cache(maxsize=None)
+def get_model(model_name: str):
+    """
+    Returns one GenerativeModel per model name, shared by all calls (and threads)
+    instead of constructing a new client wrapper per request.
+    """
+    return genai.GenerativeModel(model_name)
 
 def safe_json_loads(text: str):
     """
@@ -46,16 +59,61 @@ def safe_json_loads(text: str):
                 # If still failing, raise original error for visibility
                 raise e
 
+def _is_retryable(error: Exception) -> bool:
+    """True for rate-limit (429) and server-side (5xx) API errors"""
+    code = getattr(error, "code", None)
+    try:
+        code = int(code)
+    except (TypeError, ValueError):
+        return False
+    return code == 429 or 500 <= code < 600
+
+_rate_lock = threading.Lock()
+_next_request_at = 0.0
+
+def _wait_for_rate_limit():
+    """
+    Spaces request starts at least 60/LLM_REQUESTS_PER_MINUTE seconds apart
+    across all threads, so concurrent callers stay within the provider quota.
+    """
+    global _next_request_at
+    rpm = Config.LLM_REQUESTS_PER_MINUTE
+    if rpm <= 0:
+        return
+    with _rate_lock:
+        now = time.monotonic()
+        slot = max(now, _next_request_at)
+        _next_request_at = slot + 60.0 / rpm
+    if slot > now:
+        time.sleep(slot - now)
+
+def _generate_content(model, full_prompt: str):
+    """
+    Calls model.generate_content, retrying 429/5xx errors with exponential backoff.
+    """
+    for attempt in range(Config.LLM_MAX_RETRIES + 1):
+        _wait_for_rate_limit()
+        try:
+            return model.generate_content(full_prompt)
+        except Exception as e:
+            if attempt >= Config.LLM_MAX_RETRIES or not _is_retryable(e):
+                raise
+            delay = 2 ** attempt
+            logger.warning(f"Gemini call failed ({e}); retrying in {delay}s (attempt {attempt + 1}/{Config.LLM_MAX_RETRIES})")
+            time.sleep(delay)
+
 def call_gemini_json(prompt: str, content: str) -> dict | list:
     """
     Calls Gemini with a prompt and content, expecting a JSON response.
     """
-    model = genai.GenerativeModel(Config.MODEL_NAME)
+    model = get_model(Config.MODEL_NAME)
     
+    # Fixed prompt first, variable content last: identical prefixes across
+    # calls are eligible for the API's implicit prompt caching
     full_prompt = f"{prompt}\n\nCONTENT:\n{content}"
     
     try:
-        response = model.generate_content(full_prompt)
+        response = _generate_content(model, full_prompt)
         text = response.text
         
         # Clean up markdown code blocks
@@ -73,12 +131,12 @@ def call_gemini_text(prompt: str, content: str) -> str:
     """
     Calls Gemini with a prompt and content, returning raw text response.
     """
-    model = genai.GenerativeModel(Config.MODEL_NAME)
+    model = get_model(Config.MODEL_NAME)
     
     full_prompt = f"{prompt}\n\nCONTENT:\n{content}"
     
     try:
-        response = model.generate_content(full_prompt)
+        response = _generate_content(model, full_prompt)
         return response.text.strip()
     except Exception as e:
         logger.error(f"Error calling Gemini (Text Mode): {e}")
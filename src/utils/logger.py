@@ -2,6 +2,9 @@ import logging
 
 def setup_logger(name: str):
     logger = logging.getLogger(name)
+    # Already configured (module imported or setup called again): reuse handler
+    if logger.handlers:
+        return logger
     logger.setLevel(logging.INFO)
     handler = logging.StreamHandler()
     formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
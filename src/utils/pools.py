@@ -0,0 +1,40 @@
+"""
+Shared worker pools
+One lazily created thread pool (file I/O) and one process pool (CPU-bound
+work) reused by every phase, so a pipeline run pays worker startup once and
+interleaved phases never oversubscribe the machine.
+"""
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from src.config import Config
+
+_lock = threading.Lock()
+_io_pool = None
+_cpu_pool = None
+
+
+def get_io_pool() -> ThreadPoolExecutor:
+    """
+    Returns the shared thread pool for I/O-bound tasks (sized by Config.IO_WORKERS)
+    Tasks submitted here must not wait on other tasks in the same pool.
+    """
+    global _io_pool
+    if _io_pool is None:
+        with _lock:
+            if _io_pool is None:
+                _io_pool = ThreadPoolExecutor(max_workers=max(1, Config.IO_WORKERS),
+                                              thread_name_prefix="io")
+                atexit.register(_io_pool.shutdown)
+    return _io_pool
+
+
+def get_cpu_pool() -> ProcessPoolExecutor:
+    """Returns the shared process pool for CPU-bound tasks (sized by Config.CPU_WORKERS)"""
+    global _cpu_pool
+    if _cpu_pool is None:
+        with _lock:
+            if _cpu_pool is None:
+                _cpu_pool = ProcessPoolExecutor(max_workers=max(1, Config.CPU_WORKERS))
+                atexit.register(_cpu_pool.shutdown)
+    return _cpu_pool
@@ -7,15 +7,19 @@ This shows the full flow after question extraction.
 import os
 import sys
 import json
+from itertools import chain
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from src.config import Config
 
-# Set test class
-Config.DEFAULT_CLASS = "class_7"
+def main():
+    from src.config import Config
+    from src.utils.json_helper import load_json_file, iter_json_array
 
-print("""
+    # Set test class
+    Config.DEFAULT_CLASS = "class_7"
+
+    print("""
 =================================================================
 COMPLETE ENRICHMENT PIPELINE TEST
 =================================================================
@@ -37,65 +41,81 @@ And merged.json will include all fields for each (student, question) pair.
 =================================================================
 """)
 
-# Check if questionpaper.json exists
-qp_path = os.path.join(Config.OUTPUT_DIR, Config.DEFAULT_CLASS, "phase1", "questionpaper.json")
+    phase1_dir = os.path.join(Config.OUTPUT_DIR, Config.DEFAULT_CLASS, "phase1")
+
+    # Check if questionpaper.json exists
+    qp_path = os.path.join(phase1_dir, "questionpaper.json")
 
-if os.path.exists(qp_path):
-    print(f"\n✓ Found questionpaper.json at: {qp_path}")
-    
-    with open(qp_path, 'r', encoding='utf-8') as f:
-        qp_data = json.load(f)
+    # Open directly instead of checking first (one syscall, no exists/open race)
+    try:
+        qp_data = load_json_file(qp_path)
+    except FileNotFoundError:
+        print(f"\n✗ Question paper JSON not found at: {qp_path}")
+        print("\nTo run the complete pipeline:")
+        print("  python case1.py")
+    else:
+        print(f"\n✓ Found questionpaper.json at: {qp_path}")
+        
         questions = qp_data.get("questions", [])
-    
-    print(f"\nQuestion count: {len(questions)}")
-    
-    if questions:
-        # Show sample question with all enrichments
-        print(f"\nSample question (first one):")
-        sample = questions[0]
-        print(json.dumps(sample, indent=2))
         
-        # Count enrichments
-        has_subject = sum(1 for q in questions if q.get("subject") and q.get("subject") != "Unknown")
-        has_chapter = sum(1 for q in questions if q.get("chapter") and q.get("chapter") != "Unknown")
-        has_topic = sum(1 for q in questions if q.get("topic") and q.get("topic") != "Unknown")
+        print(f"\nQuestion count: {len(questions)}")
+        
+        if questions:
+            # Show sample question with all enrichments
+            print(f"\nSample question (first one):")
+            sample = questions[0]
+            print(json.dumps(sample, indent=2))
+            
+            # Count enrichments (one pass over the questions for all three)
+            missing = frozenset({None, "", "Unknown"})
+            has_subject = has_chapter = has_topic = 0
+            for q in questions:
+                if q.get("subject") not in missing:
+                    has_subject += 1
+                if q.get("chapter") not in missing:
+                    has_chapter += 1
+                if q.get("topic") not in missing:
+                    has_topic += 1
+            
+            print(f"\nEnrichment status:")
+            print(f"  Questions with subject: {has_subject}/{len(questions)}")
+            print(f"  Questions with chapter: {has_chapter}/{len(questions)}")
+            print(f"  Questions with topic: {has_topic}/{len(questions)}")
+
+    # Check merged.json
+    merged_path = os.path.join(phase1_dir, "merged.json")
+
+    # The stream opens the file on the first next(), which raises if it is missing
+    try:
+        records = iter_json_array(merged_path)
+        first_record = next(records, None)
+    except FileNotFoundError:
+        print(f"\n✗ Merged JSON not found at: {merged_path}")
+    else:
+        print(f"\n✓ Found merged.json at: {merged_path}")
         
-        print(f"\nEnrichment status:")
-        print(f"  Questions with subject: {has_subject}/{len(questions)}")
-        print(f"  Questions with chapter: {has_chapter}/{len(questions)}")
-        print(f"  Questions with topic: {has_topic}/{len(questions)}")
-else:
-    print(f"\n✗ Question paper JSON not found at: {qp_path}")
-    print("\nTo run the complete pipeline:")
-    print("  python case1.py")
-
-# Check merged.json
-merged_path = os.path.join(Config.OUTPUT_DIR, Config.DEFAULT_CLASS, "phase1", "merged.json")
-
-if os.path.exists(merged_path):
-    print(f"\n✓ Found merged.json at: {merged_path}")
-    
-    with open(merged_path, 'r', encoding='utf-8') as f:
-        merged = json.load(f)
-    
-    print(f"\nMerged records count: {len(merged)}")
-    
-    if merged:
-        print(f"\nSample merged record (first one):")
-        print(json.dumps(merged[0], indent=2))
+        # Stream the records: only the counts and the first record are kept
+        required_fields = {"subject", "chapter", "topic", "correct_option", "student_selected_option"}
+        merged_count = has_all_fields = 0
+        if first_record is not None:
+            for record in chain((first_record,), records):
+                merged_count += 1
+                if required_fields <= record.keys():
+                    has_all_fields += 1
         
-        # Check field completeness
-        has_all_fields = sum(1 for r in merged if all(
-            k in r for k in ["subject", "chapter", "topic", "correct_option", "student_selected_option"]
-        ))
-        print(f"\nRecords with complete enrichment: {has_all_fields}/{len(merged)}")
-else:
-    print(f"\n✗ Merged JSON not found at: {merged_path}")
-
-print("\n" + "="*65)
-print("RUNNING THE PIPELINE")
-print("="*65)
-print("""
+        print(f"\nMerged records count: {merged_count}")
+        
+        if merged_count:
+            print(f"\nSample merged record (first one):")
+            print(json.dumps(first_record, indent=2))
+            
+            # Check field completeness
+            print(f"\nRecords with complete enrichment: {has_all_fields}/{merged_count}")
+
+    print("\n" + "="*65)
+    print("RUNNING THE PIPELINE")
+    print("="*65)
+    print("""
 To execute the complete pipeline with all enrichments:
 
   python case1.py
@@ -112,3 +132,7 @@ The pipeline handles:
 - Batch processing for LLM (15 questions per chunk)
 - Graceful handling of missing data
 """)
+
+
+if __name__ == "__main__":
+    main()
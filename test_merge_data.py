@@ -0,0 +1,57 @@
+"""
+Test for merge_data.py: a missing question field must be written as null
+(valid JSON), including with the stdlib fallback encoder (orjson not installed)
+"""
+import os
+import sys
+import json
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_missing_question_field_is_null_with_stdlib_encoder():
+    """A None question_text/topic becomes null in merged.json, never NaN"""
+    import pandas as pd
+    from src.config import Config
+    from src.phase1 import merge_data
+    from src.utils import json_helper
+    
+    original = (Config.OUTPUT_DIR, Config.DEFAULT_CLASS, json_helper.orjson)
+    with tempfile.TemporaryDirectory() as output_dir:
+        Config.OUTPUT_DIR = output_dir
+        Config.DEFAULT_CLASS = "class_test"
+        # Force the stdlib fallback path of json_dumps
+        json_helper.orjson = None
+        try:
+            phase1_dir = os.path.join(output_dir, "class_test", "phase1")
+            os.makedirs(phase1_dir)
+            questions = [
+                {"question_number": 1, "question_text": "Q1 text", "options": ["(1) a", "(2) b"],
+                 "subject": "Physics", "chapter": "Motion", "topic": "Speed"},
+                {"question_number": 2, "question_text": None, "options": [],
+                 "subject": "Physics", "chapter": "Motion", "topic": None},
+            ]
+            with open(os.path.join(phase1_dir, "questionpaper.json"), "w", encoding="utf-8") as f:
+                json.dump({"questions": questions}, f)
+            
+            df_answer = pd.DataFrame({"question_id": [1, 2], "Answer": ["A", "B"]})
+            df_response = pd.DataFrame({"question_id": [1, 2], "S1": ["A", "C"], "S2": ["B", None]})
+            merge_data.process((df_answer, df_response))
+            
+            with open(os.path.join(phase1_dir, "merged.json"), "r", encoding="utf-8") as f:
+                raw = f.read()
+        finally:
+            Config.OUTPUT_DIR, Config.DEFAULT_CLASS, json_helper.orjson = original
+    
+    assert "NaN" not in raw
+    records = json.loads(raw)
+    assert len(records) == 4
+    q2 = [r for r in records if r["question_id"] == 2]
+    assert all(r["question_text"] is None and r["topic"] is None for r in q2)
+    assert all(r["question_text"] == "Q1 text" for r in records if r["question_id"] == 1)
+
+
+if __name__ == "__main__":
+    test_missing_question_field_is_null_with_stdlib_encoder()
+    print("✓ merge_data writes null for missing question fields")
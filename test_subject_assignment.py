@@ -4,17 +4,19 @@ This shows how the interactive prompt works and validates the output
 """
 import os
 import sys
-import json
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from src.phase1 import add_subjects
-from src.config import Config
 
-# Set test class
-Config.DEFAULT_CLASS = "class_7"
+def main():
+    from src.phase1 import add_subjects
+    from src.config import Config
+    from src.utils.json_helper import load_json_file
 
-print("""
+    # Set test class
+    Config.DEFAULT_CLASS = "class_7"
+
+    print("""
 =================================================================
 SUBJECT ASSIGNMENT TEST
 =================================================================
@@ -36,51 +38,54 @@ The questionpaper.json will be updated with subject fields.
 =================================================================
 """)
 
-# Check if questionpaper.json exists
-qp_path = os.path.join(Config.OUTPUT_DIR, Config.DEFAULT_CLASS, "phase1", "questionpaper.json")
+    # Check if questionpaper.json exists
+    qp_path = os.path.join(Config.OUTPUT_DIR, Config.DEFAULT_CLASS, "phase1", "questionpaper.json")
 
-if not os.path.exists(qp_path):
-    print(f"ERROR: Question paper JSON not found at: {qp_path}")
-    print("Please run case1.py first to extract questions from the PDF.")
-    sys.exit(1)
+    if not os.path.exists(qp_path):
+        print(f"ERROR: Question paper JSON not found at: {qp_path}")
+        print("Please run case1.py first to extract questions from the PDF.")
+        sys.exit(1)
 
-print(f"Found questionpaper.json at: {qp_path}")
+    print(f"Found questionpaper.json at: {qp_path}")
 
-# Show current questions (first 3 and last 3)
-with open(qp_path, 'r', encoding='utf-8') as f:
-    qp_data = json.load(f)
+    # Show current questions (first 3 and last 3)
+    qp_data = load_json_file(qp_path)
     questions = qp_data.get("questions", [])
 
-print(f"\nCurrent question count: {len(questions)}")
-if questions:
-    print(f"Question number range: Q{questions[0].get('question_number')} to Q{questions[-1].get('question_number')}")
-    print(f"\nFirst question: {questions[0].get('question_number')} - {questions[0].get('question_text', '')[:60]}...")
-    print(f"Last question: {questions[-1].get('question_number')} - {questions[-1].get('question_text', '')[:60]}...")
-
-print("\n" + "="*60)
-print("Starting interactive subject assignment...")
-print("="*60 + "\n")
+    print(f"\nCurrent question count: {len(questions)}")
+    if questions:
+        print(f"Question number range: Q{questions[0].get('question_number')} to Q{questions[-1].get('question_number')}")
+        print(f"\nFirst question: {questions[0].get('question_number')} - {questions[0].get('question_text', '')[:60]}...")
+        print(f"Last question: {questions[-1].get('question_number')} - {questions[-1].get('question_text', '')[:60]}...")
 
-# Run the subject assignment
-try:
-    add_subjects.process()
-    
     print("\n" + "="*60)
-    print("✓ Subject assignment completed!")
-    print("="*60)
-    
-    # Show sample of updated data
-    with open(qp_path, 'r', encoding='utf-8') as f:
-        updated_data = json.load(f)
+    print("Starting interactive subject assignment...")
+    print("="*60 + "\n")
+
+    # Run the subject assignment
+    try:
+        updated_data = add_subjects.process()
+        
+        print("\n" + "="*60)
+        print("✓ Subject assignment completed!")
+        print("="*60)
+        
+        # Show sample of updated data (the file is only re-read if nothing was assigned)
+        if updated_data is None:
+            updated_data = load_json_file(qp_path)
         updated_questions = updated_data.get("questions", [])
-    
-    print(f"\nSample of updated questions (showing first 3):")
-    for i, q in enumerate(updated_questions[:3]):
-        print(f"\nQuestion {q.get('question_number')}:")
-        print(f"  Subject: {q.get('subject', 'Unknown')}")
-        print(f"  Text: {q.get('question_text', '')[:80]}...")
-    
-except Exception as e:
-    print(f"\nERROR: {e}")
-    import traceback
-    traceback.print_exc()
+        
+        print(f"\nSample of updated questions (showing first 3):")
+        for i, q in enumerate(updated_questions[:3]):
+            print(f"\nQuestion {q.get('question_number')}:")
+            print(f"  Subject: {q.get('subject', 'Unknown')}")
+            print(f"  Text: {q.get('question_text', '')[:80]}...")
+        
+    except Exception as e:
+        print(f"\nERROR: {e}")
+        import traceback
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    main()